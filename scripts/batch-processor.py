@@ -6,19 +6,33 @@ Processes all HTML files in a folder and subfolders through the Nova i-Gaming re
 
 import argparse
 import json
+import os
 import shutil
 import sys
+import threading
+import time
+import uuid
 from datetime import datetime
 from pathlib import Path
 
 try:
-    from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+    from bs4 import XMLParsedAsHTMLWarning
     import warnings
     warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 except ImportError:
     print("ERROR: beautifulsoup4 required. Install: pip install beautifulsoup4")
     sys.exit(1)
 
+from nova_boilerplate import (DEFAULT_SAMPLE, DEFAULT_THRESHOLD, learn_or_load, load_rules, strip_boilerplate,
+                              strip_fixed_tags)
+from nova_bundle import COMPRESSIONS, export_bundle, print_bundle_result
+from nova_dedupe import add_copies, dedupe_manifest, dependents, remove_copies
+from nova_schedule import SCHEDULE_ORDERS, apply_priorities, load_priorities, schedule
+from nova_workers import OK, TIMEOUT, FileWorkerPool
+from nova_telemetry import DEFAULT_FLUSH_SECONDS, BatchTelemetry, print_telemetry, read_telemetry
+from nova_common import (META_FORMATS, PARSER_ENGINES, file_hash, kept_backup, load_meta_header, make_soup,
+                         meta_filename, parse_with_fallback, read_html, resolve_parser, save_meta_file)
+
 
 def find_html_files(folder: str, pattern: str = "*.html") -> list:
     """Find all HTML files in folder and subfolders (recursive by default)."""
@@ -29,11 +43,14 @@ def find_html_files(folder: str, pattern: str = "*.html") -> list:
     return sorted(folder_path.rglob(pattern))
 
 
-def create_batch_manifest(folder: str, output_dir: str, files: list) -> dict:
+def create_batch_manifest(folder: str, output_dir: str, files: list, parser: str = 'html.parser',
+                          meta_format: str = 'json') -> dict:
     """Create manifest tracking all files to process."""
     manifest = {
         "source_folder": str(Path(folder).resolve()),
         "output_dir": str(Path(output_dir).resolve()),
+        "parser": parser,
+        "meta_format": meta_format,
         "created_at": datetime.now().isoformat(),
         "total_files": len(files),
         "status": "pending",
@@ -57,9 +74,11 @@ def create_batch_manifest(folder: str, output_dir: str, files: list) -> dict:
 
 
 def save_manifest(manifest: dict, manifest_path: str):
-    """Save manifest to JSON file."""
-    with open(manifest_path, 'w', encoding='utf-8') as f:
+    """Save manifest to JSON file (atomic replace, safe for concurrent --status readers)."""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
 
 
 def load_manifest(manifest_path: str) -> dict:
@@ -68,8 +87,24 @@ def load_manifest(manifest_path: str) -> dict:
         return json.load(f)
 
 
-def parse_html_file(html_path: Path, output_dir: Path, preserve_structure: bool = True) -> dict:
-    """Parse a single HTML file and extract sections."""
+def create_backup(html_path: Path) -> Path:
+    """Copy the original page into .nova-backups next to it for rollback."""
+    backup_dir = html_path.parent / ".nova-backups"
+    backup_dir.mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    backup_path = backup_dir / f"{html_path.stem}_{timestamp}.html.bak"
+    n = 1
+    while backup_path.exists():
+        # Never overwrite an earlier backup taken in the same second
+        backup_path = backup_dir / f"{html_path.stem}_{timestamp}-{n}.html.bak"
+        n += 1
+    shutil.copy2(html_path, backup_path)
+    return backup_path
+
+
+def parse_html_file(html_path: Path, output_dir: Path, preserve_structure: bool = True,
+                    parser: str = 'html.parser', meta_format: str = 'json', boilerplate: dict = None) -> dict:
+    """Parse a single HTML file and extract sections, minus learned boilerplate rules."""
     # Determine output location
     if preserve_structure:
         # Keep same folder structure
@@ -79,18 +114,14 @@ def parse_html_file(html_path: Path, output_dir: Path, preserve_structure: bool
         meta_dir = output_dir
 
     meta_dir.mkdir(parents=True, exist_ok=True)
+    meta_path = meta_dir / meta_filename(html_path.stem, meta_format)
 
-    # Create backup in source folder
-    backup_dir = html_path.parent / ".nova-backups"
-    backup_dir.mkdir(exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    backup_name = f"{html_path.stem}_{timestamp}.html.bak"
-    backup_path = backup_dir / backup_name
-    shutil.copy2(html_path, backup_path)
+    # Create backup in source folder (a re-parse keeps the backup of the original)
+    backup_path = kept_backup(meta_path, html_path) or create_backup(html_path)
 
     # Parse HTML
-    with open(html_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+    markup, encoding = read_html(html_path)
+    soup, parser = parse_with_fallback(markup, parser)
 
     # Extract meta
     title = ""
@@ -104,14 +135,15 @@ def parse_html_file(html_path: Path, output_dir: Path, preserve_structure: bool
         description = meta_desc.get('content', '')
 
     # Create working copy for extraction
-    content_soup = BeautifulSoup(str(soup), 'html.parser')
-    for tag in content_soup(['script', 'style', 'nav', 'footer', 'aside', 'noscript', 'iframe', 'header']):
-        tag.decompose()
+    content_soup = make_soup(str(soup), parser)
+    strip_fixed_tags(content_soup)
 
     body = content_soup.find('body')
     sections = []
+    boilerplate_removed = 0
 
     if body:
+        boilerplate_removed = strip_boilerplate(body, boilerplate)
         main_content = (
             body.find('main') or
             body.find('article') or
@@ -173,7 +205,6 @@ def parse_html_file(html_path: Path, output_dir: Path, preserve_structure: bool
             sections.append(current_section)
 
     # Save metadata
-    meta_path = meta_dir / f"{html_path.stem}_meta.json"
     metadata = {
         "source_file": str(html_path.resolve()),
         "backup_path": str(backup_path),
@@ -181,22 +212,223 @@ def parse_html_file(html_path: Path, output_dir: Path, preserve_structure: bool
         "original_description": description,
         "sections": sections,
         "total_sections": len(sections),
+        "parser": parser,
+        "source_encoding": encoding,
+        "boilerplate_removed": boilerplate_removed,
         "extracted_at": datetime.now().isoformat(),
         "status": "pending_rewrite"
     }
 
-    with open(meta_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    save_meta_file(meta_path, metadata)
 
     return {
         "meta_file": str(meta_path),
         "sections": len(sections),
-        "backup": str(backup_path)
+        "backup": str(backup_path),
+        "parser": parser,
+        "encoding": encoding,
+        "boilerplate_removed": boilerplate_removed
     }
 
 
-def process_folder(folder: str, output_dir: str = None, resume: str = None) -> dict:
-    """Process all HTML files in folder and subfolders."""
+def apply_parse_result(file_info: dict, result: dict, engine: str):
+    """Record a successful parse_html_file result on its manifest entry."""
+    file_info["meta_file"] = result["meta_file"]
+    file_info["sections"] = result["sections"]
+    file_info["parser"] = result["parser"]
+    file_info["encoding"] = result["encoding"]
+    file_info["status"] = "parsed"
+    file_info["error"] = None
+    notes = [f"fallback: {result['parser']}"] if result["parser"] != engine else []
+    if result["encoding"] != "utf-8":
+        notes.append(f"encoding: {result['encoding']}")
+    if result.get("boilerplate_removed"):
+        notes.append(f"boilerplate: -{result['boilerplate_removed']}")
+    suffix = f" ({', '.join(notes)})" if notes else ""
+    print(f"  ✓ {result['sections']} sections → {Path(result['meta_file']).name}{suffix}")
+
+
+def record_parse_failure(file_info: dict, error: str, status: str = "failed"):
+    file_info["status"] = status
+    file_info["error"] = error
+    print(f"  {'⏱' if status == 'timeout' else '✗'} Error: {error}")
+
+
+def parse_manifest_entry(file_info: dict, output_path: Path, engine: str, meta_format: str = 'json',
+                         boilerplate: dict = None) -> bool:
+    """Parse one manifest entry in place, recording status/error. Returns True on success."""
+    try:
+        result = parse_html_file(Path(file_info["source"]), output_path, preserve_structure=True,
+                                 parser=engine, meta_format=meta_format, boilerplate=boilerplate)
+    except Exception as e:
+        record_parse_failure(file_info, str(e))
+        return False
+    apply_parse_result(file_info, result, engine)
+    return True
+
+
+def link_duplicates(manifest: dict) -> int:
+    """
+    Point pending duplicates at their parsed canonical's meta file.
+    Each copy gets its own backup and is listed under "copies" in the canonical
+    meta, so updates and rollbacks reach it. Returns how many were linked.
+    """
+    by_source = {f["source"]: f for f in manifest["files"]}
+    linked = {}
+    for file_info in manifest["files"]:
+        if not file_info.get("duplicate_of") or file_info.get("status", "pending") != "pending":
+            continue
+        canonical = by_source.get(file_info["duplicate_of"])
+        if canonical is None:
+            file_info.pop("duplicate_of")
+            continue
+        if canonical.get("status") != "parsed":
+            continue
+        source = Path(file_info["source"])
+        try:
+            if file_hash(source) != file_info.get("content_hash"):
+                # Edited since discovery: no longer a copy, parse it on its own next run
+                file_info.pop("duplicate_of")
+                print(f"  ⚠️ {file_info.get('relative_path')} changed since discovery, left pending")
+                continue
+            backup_path = create_backup(source)
+        except OSError as e:
+            record_parse_failure(file_info, str(e))
+            continue
+        linked.setdefault(canonical["meta_file"], []).append(
+            {"source_file": str(source), "backup_path": str(backup_path)})
+        for key in ("meta_file", "sections", "parser", "encoding"):
+            file_info[key] = canonical.get(key)
+        file_info["status"] = "parsed"
+        file_info["error"] = None
+
+    for meta_file, copies in linked.items():
+        add_copies(meta_file, copies)
+    return sum(len(copies) for copies in linked.values())
+
+
+def detach_duplicates(manifest: dict, sources: list) -> list:
+    """
+    Undo links touched by edits or deletions: an edited/deleted copy leaves its
+    canonical's copies list, and copies of an edited/deleted canonical become
+    standalone pending entries. Returns the sources that now need their own parse.
+    """
+    by_source = {f["source"]: f for f in manifest["files"]}
+    reparse = []
+    for source in sources:
+        file_info = by_source.get(source)
+        if file_info is None:
+            continue
+        if file_info.get("duplicate_of"):
+            canonical = by_source.get(file_info.pop("duplicate_of"))
+            if file_info.get("meta_file") and canonical and file_info["meta_file"] == canonical.get("meta_file"):
+                remove_copies(file_info["meta_file"], [source])
+                file_info["meta_file"] = None
+            file_info.pop("content_hash", None)
+        for copy_info in dependents(manifest, source):
+            copy_info.pop("duplicate_of")
+            copy_info.pop("content_hash", None)
+            copy_info.update(meta_file=None, status="pending", sections=0, error=None)
+            if copy_info["source"] not in sources:
+                reparse.append(copy_info["source"])
+    return reparse
+
+
+def _file_size(path) -> int:
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+
+def _process_with_pool(manifest: dict, todo: list, output_path: Path, manifest_path: Path, engine: str,
+                       meta_format: str, telemetry: BatchTelemetry, workers: int, timeout: float,
+                       max_tasks: int, max_rss_mb: float, memory_limit_mb: float, boilerplate: dict = None,
+                       stop=None) -> dict:
+    """
+    Parse todo entries in a FileWorkerPool; timeouts get their own manifest status.
+    stop() is checked before each file is handed out; once true, files in flight finish and no more start.
+    """
+    results = {"parsed": 0, "failed": 0, "timeout": 0}
+    entries = dict(todo)
+    total = len(todo)
+
+    def tasks():
+        for i, file_info in todo:
+            if stop and stop():
+                return
+            args = (Path(file_info["source"]), output_path, True, engine, meta_format, boilerplate)
+            telemetry.begin()
+            yield i, args, file_info.get("timeout_budget") or timeout
+
+    def on_result(outcome):
+        file_info = entries[outcome["key"]]
+        print(f"\n[{outcome['key'] + 1}/{manifest['total_files']}] {file_info.get('relative_path')} "
+              f"({outcome['seconds']:.1f}s)")
+        if outcome["status"] == OK:
+            apply_parse_result(file_info, outcome["result"], engine)
+            results["parsed"] += 1
+        elif outcome["status"] == TIMEOUT:
+            file_info["timeout_budget"] = file_info.get("timeout_budget") or timeout
+            record_parse_failure(file_info, outcome["error"], "timeout")
+            results["timeout"] += 1
+        else:
+            record_parse_failure(file_info, outcome["error"])
+            results["failed"] += 1
+
+        finished = results["parsed"] + results["failed"] + results["timeout"]
+        telemetry.set_queue(pending=total - finished - pool.in_flight, in_flight=pool.in_flight,
+                            workers_recycled=pool.recycled)
+        telemetry.record(_file_size(file_info["source"]), outcome["seconds"], outcome["status"] == OK)
+        save_manifest(manifest, str(manifest_path))
+
+    with FileWorkerPool(parse_html_file, workers, max_tasks, max_rss_mb, memory_limit_mb) as pool:
+        pool.run(tasks(), on_result)
+        print(f"\n♻️  Workers recycled: {pool.recycled}")
+    return results
+
+
+def prioritize_manifest(manifest: dict, order: str = None, priority_file: str = None) -> str:
+    """Load priority weights into the manifest and settle the work order (kept across --resume)."""
+    if priority_file:
+        matched = apply_priorities(manifest["files"], load_priorities(priority_file))
+        manifest["priority_file"] = str(Path(priority_file).resolve())
+        print(f"⭐ Priorities: {matched}/{len(manifest['files'])} files matched in {Path(priority_file).name}")
+    order = order or ('priority' if priority_file else manifest.get("order", 'path'))
+    if order not in SCHEDULE_ORDERS:
+        raise ValueError(f"Unknown order '{order}' (choose: {', '.join(SCHEDULE_ORDERS)})")
+    manifest["order"] = order
+    return order
+
+
+def prepare_boilerplate(manifest: dict, output_path: Path, engine: str, threshold: float = DEFAULT_THRESHOLD,
+                        sample: int = DEFAULT_SAMPLE, relearn: bool = False) -> dict:
+    """Learn (or reuse this site's cached) boilerplate rules and record them in the manifest."""
+    sources = [f["source"] for f in manifest["files"]]
+    rules, path, cached = learn_or_load(output_path, sources, engine, threshold, sample, relearn)
+    manifest["boilerplate"] = str(path)
+    print(f"🧹 Boilerplate rules {'(cached)' if cached else 'learned'}: {len(rules['text'])} text, "
+          f"{len(rules['selector'])} selector from {rules['pages_sampled']} pages → {path.name}")
+    return rules
+
+
+def manifest_boilerplate(manifest: dict) -> dict:
+    """Rules a batch was started with (None if it wasn't)."""
+    return load_rules(manifest["boilerplate"]) if manifest.get("boilerplate") else None
+
+
+# Timed-out files are retried (--retry-timeouts) with their previous budget times this factor
+TIMEOUT_BACKOFF = 2
+
+
+def process_folder(folder: str, output_dir: str = None, resume: str = None, parser: str = None,
+                   meta_format: str = None, metrics_interval: float = DEFAULT_FLUSH_SECONDS,
+                   prometheus: bool = False, workers: int = 1, timeout: float = 0, max_tasks: int = 0,
+                   max_rss_mb: float = 0, memory_limit_mb: float = 0, retry_timeouts: bool = False,
+                   order: str = None, priority_file: str = None, top: int = 0, boilerplate: bool = False,
+                   boilerplate_threshold: float = DEFAULT_THRESHOLD, boilerplate_sample: int = DEFAULT_SAMPLE,
+                   relearn: bool = False, dedupe: bool = True) -> dict:
+    """Process all HTML files in folder and subfolders (byte-identical copies are parsed once)."""
     folder_path = Path(folder).resolve()
     output_path = Path(output_dir).resolve() if output_dir else folder_path / ".nova-meta"
     output_path.mkdir(parents=True, exist_ok=True)
@@ -207,60 +439,100 @@ def process_folder(folder: str, output_dir: str = None, resume: str = None) -> d
     if resume and Path(resume).exists():
         manifest = load_manifest(resume)
         print(f"📂 Resuming from: {resume}")
+        # Keep the engine the batch started with unless explicitly overridden
+        parser = parser or manifest.get("parser")
+        meta_format = meta_format or manifest.get("meta_format", "json")
     else:
-        html_files = find_html_files(folder)
+        html_files = find_html_files(str(folder_path))
         if not html_files:
             print(f"❌ No HTML files found in: {folder}")
             return {"error": "No HTML files found"}
 
-        manifest = create_batch_manifest(str(folder_path), str(output_path), html_files)
+        meta_format = meta_format or "json"
+        manifest = create_batch_manifest(str(folder_path), str(output_path), html_files,
+                                         resolve_parser(parser), meta_format)
+        if dedupe:
+            manifest["duplicates"] = dedupe_manifest(manifest)
         save_manifest(manifest, str(manifest_path))
         print(f"📂 Source: {folder_path}")
         print(f"📁 Output: {output_path}")
         print(f"📋 Manifest: {manifest_path}")
 
+    order = prioritize_manifest(manifest, order, priority_file)
+
+    # Timed-out files go back in the queue with a larger budget
+    if retry_timeouts:
+        for f in manifest["files"]:
+            if f.get("status") == "timeout":
+                f["status"] = "pending"
+                f["timeout_budget"] = max(timeout, f.get("timeout_budget", timeout) * TIMEOUT_BACKOFF)
+
     # Count by status
-    stats = {"pending": 0, "parsed": 0, "rewritten": 0, "updated": 0, "failed": 0}
+    stats = {"pending": 0, "parsed": 0, "rewritten": 0, "updated": 0, "failed": 0, "timeout": 0}
     for f in manifest["files"]:
         status = f.get("status", "pending")
         stats[status] = stats.get(status, 0) + 1
 
-    print(f"\n📊 Files: {manifest['total_files']} total, {stats['pending']} pending")
+    engine = resolve_parser(parser)
+    waiting = sum(1 for f in manifest["files"] if f.get("duplicate_of") and f.get("status", "pending") == "pending")
+    print(f"\n📊 Files: {manifest['total_files']} total, {stats['pending']} pending (parser: {engine})")
+    if waiting:
+        print(f"🔗 Duplicates: {waiting} identical copies will link to their canonical page (parsed once)")
 
-    # Process pending files
-    results = {"parsed": 0, "failed": 0, "skipped": manifest['total_files'] - stats['pending']}
+    if boilerplate or relearn:
+        rules = prepare_boilerplate(manifest, output_path, engine, boilerplate_threshold, boilerplate_sample, relearn)
+    else:
+        rules = manifest_boilerplate(manifest)
 
-    for i, file_info in enumerate(manifest["files"]):
-        if file_info["status"] != "pending":
-            continue
+    # Process pending files
+    todo = schedule([(i, f) for i, f in enumerate(manifest["files"])
+                     if f["status"] == "pending" and not f.get("duplicate_of")],
+                    order, entry=lambda item: item[1])
+    if top:
+        # Top pages first: this run only takes the first N, the rest stay pending for --resume
+        todo = todo[:top]
+    if order != 'path':
+        print(f"🔀 Order: {order}" + (f", top {len(todo)} of {stats['pending'] - waiting}" if top else ""))
+
+    results = {"parsed": 0, "failed": 0, "timeout": 0, "linked": 0,
+               "skipped": manifest['total_files'] - len(todo) - waiting}
+    telemetry = BatchTelemetry(output_path, "batch", len(todo), flush_every=metrics_interval,
+                               prometheus=prometheus).start()
+
+    if workers > 1 or timeout or max_tasks or max_rss_mb or memory_limit_mb:
+        # Isolated, recyclable worker processes with per-file limits
+        pool_results = _process_with_pool(manifest, todo, output_path, manifest_path, engine, meta_format, telemetry,
+                                          workers, timeout, max_tasks, max_rss_mb, memory_limit_mb, rules)
+        for key in ("parsed", "failed", "timeout"):
+            results[key] += pool_results[key]
+    else:
+        for i, file_info in todo:
+            source = Path(file_info["source"])
+            rel_path = file_info.get("relative_path", source.name)
+            print(f"\n[{i+1}/{manifest['total_files']}] {rel_path}")
 
-        source = Path(file_info["source"])
-        rel_path = file_info.get("relative_path", source.name)
-        print(f"\n[{i+1}/{manifest['total_files']}] {rel_path}")
+            started = time.perf_counter()
+            telemetry.begin()
+            ok = parse_manifest_entry(file_info, output_path, engine, meta_format, rules)
+            results["parsed" if ok else "failed"] += 1
+            telemetry.set_queue(pending=len(todo) - results["parsed"] - results["failed"])
+            telemetry.record(_file_size(source), time.perf_counter() - started, ok)
 
-        try:
-            result = parse_html_file(source, output_path, preserve_structure=True)
-            file_info["meta_file"] = result["meta_file"]
-            file_info["sections"] = result["sections"]
-            file_info["status"] = "parsed"
-            results["parsed"] += 1
-            print(f"  ✓ {result['sections']} sections → {Path(result['meta_file']).name}")
-        except Exception as e:
-            file_info["status"] = "failed"
-            file_info["error"] = str(e)
-            results["failed"] += 1
-            print(f"  ✗ Error: {e}")
+            # Save progress after each file
+            save_manifest(manifest, str(manifest_path))
 
-        # Save progress after each file
-        save_manifest(manifest, str(manifest_path))
+    if waiting:
+        results["linked"] = link_duplicates(manifest)
+        print(f"\n🔗 Linked {results['linked']} duplicate copies to their canonical meta files")
 
     # Update manifest status
-    if results["failed"] == 0 and stats["pending"] > 0:
-        manifest["status"] = "parsed"
-    elif results["failed"] > 0:
+    if results["failed"] > 0 or results["timeout"] > 0:
         manifest["status"] = "partial"
+    elif stats["pending"] > 0 and not any(f.get("status", "pending") == "pending" for f in manifest["files"]):
+        manifest["status"] = "parsed"
     manifest["completed_at"] = datetime.now().isoformat()
     save_manifest(manifest, str(manifest_path))
+    telemetry.close()
 
     return {
         "manifest": str(manifest_path),
@@ -269,17 +541,552 @@ def process_folder(folder: str, output_dir: str = None, resume: str = None) -> d
     }
 
 
-def show_status(manifest_path: str):
+# Statuses a watched file may be re-parsed from; later stages hold rewrites we must not clobber
+REPARSABLE_STATUSES = {"pending", "parsed", "failed"}
+
+
+def holds_rewrite(file_info: dict) -> bool:
+    """
+    True once the entry's meta is past pending_rewrite (rewritten, updated, rolled back).
+    The manifest entry stays "parsed" through those stages, so the meta header decides.
+    """
+    meta_file = file_info.get("meta_file")
+    if not meta_file or not Path(meta_file).exists():
+        return False
+    try:
+        return load_meta_header(meta_file).get("status", "pending_rewrite") != "pending_rewrite"
+    except (OSError, ValueError):
+        return False
+
+
+def scan_fingerprints(folder_path: Path, pattern: str = "*.html") -> dict:
+    """Map every HTML file under folder to its (mtime_ns, size) fingerprint."""
+    table = {}
+    for html_file in find_html_files(str(folder_path), pattern):
+        try:
+            st = html_file.stat()
+        except FileNotFoundError:
+            continue
+        table[str(html_file.resolve())] = (st.st_mtime_ns, st.st_size)
+    return table
+
+
+def diff_fingerprints(old: dict, new: dict) -> tuple:
+    """Return (created, modified, deleted) source paths between two fingerprint tables."""
+    created = [p for p in new if p not in old]
+    modified = [p for p in new if p in old and new[p] != old[p]]
+    deleted = [p for p in old if p not in new]
+    return created, modified, deleted
+
+
+class ChangeWaiter:
+    """Block until the folder may have changed: inotify when available, else plain sleep (polling)."""
+
+    def __init__(self, folder_path: Path, interval: float):
+        self.folder_path = folder_path
+        self.interval = interval
+        self.inotify = None
+        self.watched = set()
+        try:
+            from inotify_simple import INotify, flags
+            self.inotify = INotify()
+            self.mask = (flags.CREATE | flags.MODIFY | flags.DELETE | flags.MOVED_TO |
+                         flags.MOVED_FROM | flags.CLOSE_WRITE)
+            self.refresh()
+        except (ImportError, OSError):
+            self.inotify = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self.inotify else "polling"
+
+    def refresh(self):
+        """Add watches for directories created since the last call."""
+        if not self.inotify:
+            return
+        for d in [self.folder_path] + [p for p in self.folder_path.rglob('*') if p.is_dir()]:
+            if d.name.startswith('.nova-') or str(d) in self.watched:
+                continue
+            try:
+                self.inotify.add_watch(str(d), self.mask)
+                self.watched.add(str(d))
+            except OSError:
+                pass
+
+    def wait(self, timeout: float = None):
+        timeout = self.interval if timeout is None else timeout
+        if self.inotify:
+            # Events only wake us up; the mtime scan decides what actually changed
+            self.inotify.read(timeout=int(timeout * 1000))
+        else:
+            time.sleep(timeout)
+
+
+def apply_changes(manifest: dict, folder_path: Path, output_path: Path, engine: str,
+                  created: list, modified: list, deleted: list, boilerplate: dict = None) -> dict:
+    """Apply created/modified/deleted files to the in-memory manifest, parsing only affected files."""
+    by_source = {f["source"]: f for f in manifest["files"]}
+    counts = {"created": 0, "modified": 0, "deleted": 0, "failed": 0, "skipped": 0}
+
+    # Edited or deleted pages no longer mirror their duplicates; orphaned copies get their own parse
+    detached = detach_duplicates(manifest, [s for s in modified + deleted if s in by_source])
+    modified = modified + [s for s in detached if s not in deleted]
+
+    if deleted:
+        gone = set(deleted)
+        manifest["files"] = [f for f in manifest["files"] if f["source"] not in gone]
+        for source in deleted:
+            if source in by_source:
+                counts["deleted"] += 1
+                print(f"  🗑  {by_source[source].get('relative_path', source)}")
+
+    for source in created + modified:
+        file_info = by_source.get(source)
+        if file_info is None:
+            html_file = Path(source)
+            file_info = {
+                "source": source,
+                "relative_path": str(html_file.relative_to(folder_path)),
+                "name": html_file.name,
+                "meta_file": None,
+                "status": "pending",
+                "sections": 0,
+                "error": None
+            }
+            manifest["files"].append(file_info)
+            kind = "created"
+        elif file_info.get("status", "pending") in REPARSABLE_STATUSES and not holds_rewrite(file_info):
+            kind = "modified"
+        else:
+            # Rewritten/updated pages change on disk when html-updater.py writes them
+            counts["skipped"] += 1
+            continue
+
+        print(f"  {'➕' if kind == 'created' else '✏️ '} {file_info['relative_path']}")
+        if parse_manifest_entry(file_info, output_path, engine, manifest.get("meta_format", "json"), boilerplate):
+            counts[kind] += 1
+        else:
+            counts["failed"] += 1
+
+    manifest["files"].sort(key=lambda f: f.get("relative_path", f["source"]))
+    manifest["total_files"] = len(manifest["files"])
+    if any(f.get("status") == "failed" for f in manifest["files"]):
+        manifest["status"] = "partial"
+    elif any(f.get("status") == "pending" for f in manifest["files"]):
+        manifest["status"] = "pending"
+    else:
+        manifest["status"] = "parsed"
+    return counts
+
+
+def watch_folder(folder: str, output_dir: str = None, parser: str = None,
+                 interval: float = 2.0, debounce: float = 1.0, meta_format: str = None):
+    """Keep parsing new/changed HTML files until interrupted (Ctrl+C)."""
+    folder_path = Path(folder).resolve()
+    output_path = Path(output_dir).resolve() if output_dir else folder_path / ".nova-meta"
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_path / "batch_manifest.json"
+
+    if manifest_path.exists():
+        manifest = load_manifest(str(manifest_path))
+        parser = parser or manifest.get("parser")
+        print(f"📂 Watching with existing manifest: {manifest_path}")
+    else:
+        manifest = create_batch_manifest(str(folder_path), str(output_path), [], resolve_parser(parser),
+                                         meta_format or "json")
+        print(f"📂 Watching: {folder_path}")
+    engine = resolve_parser(parser)
+    rules = manifest_boilerplate(manifest)
+
+    # Initial reconcile: anything on disk but not in the manifest is new, the reverse is deleted
+    fingerprints = scan_fingerprints(folder_path)
+    known = {f["source"]: None for f in manifest["files"]}
+    created, _, deleted = diff_fingerprints(known, fingerprints)
+    pending = [f["source"] for f in manifest["files"]
+               if f.get("status") == "pending" and f["source"] in fingerprints]
+    apply_changes(manifest, folder_path, output_path, engine, created, pending, deleted, rules)
+    save_manifest(manifest, str(manifest_path))
+
+    waiter = ChangeWaiter(folder_path, interval)
+    print(f"👀 {manifest['total_files']} files tracked ({waiter.mode}, parser: {engine}). Ctrl+C to stop.")
+
+    try:
+        while True:
+            waiter.wait()
+            current = scan_fingerprints(folder_path)
+            if current == fingerprints:
+                continue
+
+            # Debounce: wait until a burst of writes settles before parsing
+            while True:
+                waiter.wait(debounce)
+                settled = scan_fingerprints(folder_path)
+                if settled == current:
+                    break
+                current = settled
+
+            created, modified, deleted = diff_fingerprints(fingerprints, current)
+            fingerprints = current
+            waiter.refresh()
+
+            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] "
+                  f"+{len(created)} ~{len(modified)} -{len(deleted)}")
+            counts = apply_changes(manifest, folder_path, output_path, engine, created, modified, deleted, rules)
+            save_manifest(manifest, str(manifest_path))
+            if counts["skipped"]:
+                print(f"  ⏭  {counts['skipped']} already rewritten/updated, not re-parsed")
+    except KeyboardInterrupt:
+        save_manifest(manifest, str(manifest_path))
+        print(f"\n⏹  Stopped. Manifest: {manifest_path}")
+
+
+# --- Sharded multi-node mode ---------------------------------------------------
+# Shard files live on a shared filesystem next to the manifest. A worker owns a
+# shard while its lock file holds an unexpired lease; stale leases are taken over.
+SHARD_DIR_NAME = "shards"
+DEFAULT_LEASE_SECONDS = 300
+
+
+def shard_manifest(manifest_path: str, num_shards: int, order: str = None, priority_file: str = None) -> list:
+    """
+    Split a manifest's pending files round-robin into N shard files.
+    Files are dealt in schedule order, so every shard starts with its share of the
+    top pages (or largest files) and shard sizes stay balanced. An earlier sharding
+    is merged and removed first (refused while one of its shards is leased).
+    """
+    shards_dir = Path(manifest_path).resolve().parent / SHARD_DIR_NAME
+    retire_shards(shards_dir)
+    manifest = load_manifest(manifest_path)
+    order = prioritize_manifest(manifest, order, priority_file)
+    save_manifest(manifest, manifest_path)
+    shards_dir.mkdir(exist_ok=True)
+
+    # Duplicates are not dealt out: merge_shards links them once their canonical is parsed
+    pending = schedule([f for f in manifest["files"]
+                        if f.get("status", "pending") == "pending" and not f.get("duplicate_of")], order)
+    paths = []
+    for n in range(num_shards):
+        files = pending[n::num_shards]
+        if not files:
+            continue
+        shard = {
+            "manifest": str(Path(manifest_path).resolve()),
+            "shard": n,
+            "output_dir": manifest["output_dir"],
+            "parser": manifest.get("parser"),
+            "meta_format": manifest.get("meta_format", "json"),
+            "boilerplate": manifest.get("boilerplate"),
+            "status": "pending",
+            "total_files": len(files),
+            "files": files
+        }
+        shard_path = shards_dir / f"shard-{n:04d}.json"
+        save_manifest(shard, str(shard_path))
+        paths.append(str(shard_path))
+    return paths
+
+
+def _lock_path(shard_path) -> Path:
+    return Path(f"{shard_path}.lock")
+
+
+def _read_lock(lock_path: Path):
+    """(raw bytes, parsed lease or None, mtime) of a lock file, or None if there is none."""
+    try:
+        with open(lock_path, 'rb') as f:
+            raw = f.read()
+            mtime = os.fstat(f.fileno()).st_mtime
+    except FileNotFoundError:
+        return None
+    try:
+        lease = json.loads(raw)
+    except ValueError:
+        lease = None
+    return raw, lease if isinstance(lease, dict) else None, mtime
+
+
+def read_lease(shard_path):
+    """Current lease of a shard ({'worker', 'token', 'expires_at'}) or None."""
+    lock = _read_lock(_lock_path(shard_path))
+    return lock[1] if lock else None
+
+
+def _lease_held(lock, lease_seconds: float) -> bool:
+    """A readable lease is held until it expires; an unreadable lock is held while younger than the TTL."""
+    _, lease, mtime = lock
+    if lease is None:
+        return time.time() - mtime < lease_seconds
+    return lease.get("expires_at", 0) > time.time()
+
+
+def _link_lease(lock_path: Path, worker_id: str, token: str, lease_seconds: float, replace: bool = False) -> bool:
+    """
+    Write the lease body to a temp file, then link it into place (or replace the lock),
+    so the lock file never exists without content. False if a lock already exists.
+    """
+    tmp_path = f"{lock_path}.{token}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"worker": worker_id, "token": token, "expires_at": time.time() + lease_seconds}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        if replace:
+            os.replace(tmp_path, lock_path)
+            return True
+        os.link(tmp_path, lock_path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _owns(lock_path: Path, worker_id: str, token: str) -> bool:
+    lock = _read_lock(lock_path)
+    return bool(lock and lock[1] and lock[1].get("worker") == worker_id and lock[1].get("token") == token)
+
+
+def claim_shard(shard_path: str, worker_id: str, lease_seconds: float):
+    """
+    Take the shard's lease if it is free or expired. Returns the lease token, or None.
+    Free: link a complete lease file into place (exclusive). Expired: move the stale
+    lock aside, check it is still the one we judged stale (else put it back), link
+    ours. Either way the lock is re-read and must carry our worker id and token.
+    """
+    lock_path = _lock_path(shard_path)
+    token = uuid.uuid4().hex
+    if not _link_lease(lock_path, worker_id, token, lease_seconds):
+        lock = _read_lock(lock_path)
+        if lock is not None:
+            if _lease_held(lock, lease_seconds):
+                return None
+            # Stale: only one contender wins the rename, the rest see FileNotFoundError
+            stale_path = f"{lock_path}.stale-{token}"
+            try:
+                os.rename(lock_path, stale_path)
+            except FileNotFoundError:
+                return None
+            with open(stale_path, 'rb') as f:
+                moved = f.read()
+            if moved != lock[0]:
+                # Someone renewed or took over between our read and the rename: hand it back
+                try:
+                    os.link(stale_path, lock_path)
+                except FileExistsError:
+                    pass
+                os.unlink(stale_path)
+                return None
+            os.unlink(stale_path)
+        if not _link_lease(lock_path, worker_id, token, lease_seconds):
+            return None
+    return token if _owns(lock_path, worker_id, token) else None
+
+
+def renew_lease(shard_path: str, worker_id: str, lease_seconds: float, token: str) -> bool:
+    """Extend our lease; False if another worker has taken the shard over."""
+    lock_path = _lock_path(shard_path)
+    if not _owns(lock_path, worker_id, token):
+        return False
+    _link_lease(lock_path, worker_id, token, lease_seconds, replace=True)
+    return _owns(lock_path, worker_id, token)
+
+
+def release_shard(shard_path: str, worker_id: str, token: str):
+    if _owns(_lock_path(shard_path), worker_id, token):
+        _lock_path(shard_path).unlink(missing_ok=True)
+
+
+class LeaseHeartbeat:
+    """Renew a shard lease from a background thread, so one slow file can't outlive the TTL."""
+
+    def __init__(self, shard_path: str, worker_id: str, token: str, lease_seconds: float):
+        self.shard_path = shard_path
+        self.worker_id = worker_id
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            if not renew_lease(self.shard_path, self.worker_id, self.lease_seconds, self.token):
+                self.lost.set()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_shard_worker(shards_dir: str, worker_id: str = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                     parser: str = None, metrics_interval: float = DEFAULT_FLUSH_SECONDS,
+                     prometheus: bool = False, workers: int = 1, timeout: float = 0, max_tasks: int = 0,
+                     max_rss_mb: float = 0, memory_limit_mb: float = 0) -> dict:
+    """
+    Claim and parse shards until every shard is done (waits out other workers' leases).
+    With workers > 1 (or any limit set) files are parsed in recyclable worker processes, as in batch mode.
+    """
+    worker_id = worker_id or f"{os.uname().nodename}-{os.getpid()}"
+    shard_paths = sorted(str(p) for p in Path(shards_dir).glob("shard-*.json"))
+    results = {"shards": 0, "parsed": 0, "failed": 0, "timeout": 0}
+    print(f"🔧 Worker {worker_id}: {len(shard_paths)} shards in {shards_dir}")
+    telemetry = BatchTelemetry(Path(shards_dir).resolve().parent, f"worker-{worker_id}",
+                               flush_every=metrics_interval, prometheus=prometheus).start()
+
+    while True:
+        shards = {p: load_manifest(p) for p in shard_paths}
+        remaining = [p for p, shard in shards.items() if shard.get("status") != "done"]
+        # Queue depths across all nodes: files not parsed yet, shards waiting vs leased
+        pending_files = sum(1 for p in remaining for f in shards[p]["files"] if f.get("status", "pending") == "pending")
+        leased = sum(1 for p in remaining if read_lease(p))
+        telemetry.total_files = telemetry.done + pending_files
+        telemetry.set_queue(shards_waiting=len(remaining) - leased, shards_leased=leased, files_pending=pending_files)
+        telemetry.maybe_flush()
+        if not remaining:
+            break
+
+        claimed, token = None, None
+        for p in remaining:
+            token = claim_shard(p, worker_id, lease_seconds)
+            if token:
+                claimed = p
+                break
+        if not claimed:
+            # Everything left is leased by live workers; check again before their leases expire
+            time.sleep(min(5.0, lease_seconds / 4))
+            continue
+
+        shard = load_manifest(claimed)
+        engine = resolve_parser(parser or shard.get("parser"))
+        rules = manifest_boilerplate(shard)
+        output_path = Path(shard["output_dir"])
+        print(f"\n📦 {Path(claimed).name}: {shard['total_files']} files")
+
+        lost = threading.Event()
+        with LeaseHeartbeat(claimed, worker_id, token, lease_seconds) as heartbeat:
+            def lease_lost() -> bool:
+                if not lost.is_set() and (heartbeat.lost.is_set()
+                                          or not renew_lease(claimed, worker_id, lease_seconds, token)):
+                    print(f"  ⚠️ Lease lost to another worker, leaving {Path(claimed).name}")
+                    lost.set()
+                return lost.is_set()
+
+            todo = [(i, f) for i, f in enumerate(shard["files"]) if f.get("status", "pending") == "pending"]
+            if workers > 1 or timeout or max_tasks or max_rss_mb or memory_limit_mb:
+                pool_results = _process_with_pool(shard, todo, output_path, Path(claimed), engine,
+                                                  shard.get("meta_format", "json"), telemetry, workers, timeout,
+                                                  max_tasks, max_rss_mb, memory_limit_mb, rules, stop=lease_lost)
+                for key in ("parsed", "failed", "timeout"):
+                    results[key] += pool_results[key]
+            else:
+                for _, file_info in todo:
+                    if lease_lost():
+                        break
+                    print(f"  {file_info.get('relative_path', file_info['source'])}")
+                    started = time.perf_counter()
+                    telemetry.begin()
+                    ok = parse_manifest_entry(file_info, output_path, engine, shard.get("meta_format", "json"), rules)
+                    results["parsed" if ok else "failed"] += 1
+                    save_manifest(shard, claimed)
+                    telemetry.record(_file_size(file_info["source"]), time.perf_counter() - started, ok)
+
+        if not lost.is_set():
+            shard["status"] = "done"
+            shard["worker"] = worker_id
+            shard["completed_at"] = datetime.now().isoformat()
+            save_manifest(shard, claimed)
+            release_shard(claimed, worker_id, token)
+            results["shards"] += 1
+
+    telemetry.close()
+    return results
+
+
+def retire_shards(shards_dir: Path) -> int:
+    """
+    Fold an earlier sharding's results into its manifest, then delete its shard and lock
+    files so workers can't claim them again. Raises ValueError while a shard is leased.
+    """
+    old = sorted(shards_dir.glob("shard-*.json"))
+    for shard_path in old:
+        lock = _read_lock(_lock_path(shard_path))
+        if lock and _lease_held(lock, DEFAULT_LEASE_SECONDS):
+            raise ValueError(f"{shard_path.name} is leased by a running worker; re-shard once it is done "
+                             f"or its lease has expired")
+    if not old:
+        return 0
+    merge_shards(str(shards_dir))
+    for shard_path in old:
+        shard_path.unlink()
+        _lock_path(shard_path).unlink(missing_ok=True)
+    return len(old)
+
+
+# How far a file got; merging keeps the most advanced result for each source
+PARSE_PROGRESS = {"pending": 0, "timeout": 1, "failed": 1, "parsed": 2}
+
+
+def _progress(file_info: dict) -> int:
+    return PARSE_PROGRESS.get(file_info.get("status", "pending"), 0)
+
+
+def merge_shards(shards_dir: str) -> dict:
+    """Fold per-shard results back into the batch manifest (a stale shard never undoes a newer result)."""
+    shard_paths = sorted(Path(shards_dir).glob("shard-*.json"))
+    if not shard_paths:
+        raise FileNotFoundError(f"No shard files in {shards_dir}")
+
+    shards = [load_manifest(str(p)) for p in shard_paths]
+    manifest_path = shards[0]["manifest"]
+    manifest = load_manifest(manifest_path)
+
+    by_source = {f["source"]: f for f in manifest["files"]}
+    for shard in shards:
+        for file_info in shard["files"]:
+            current = by_source.get(file_info["source"])
+            if current is not None and _progress(file_info) > _progress(current):
+                by_source[file_info["source"]] = file_info
+    manifest["files"] = [by_source[f["source"]] for f in manifest["files"]]
+    linked = link_duplicates(manifest)
+
+    statuses = [f.get("status", "pending") for f in manifest["files"]]
+    if "failed" in statuses:
+        manifest["status"] = "partial"
+    elif "pending" in statuses:
+        manifest["status"] = "pending"
+    else:
+        manifest["status"] = "parsed"
+    manifest["merged_at"] = datetime.now().isoformat()
+    save_manifest(manifest, manifest_path)
+
+    return {
+        "manifest": manifest_path,
+        "shards_done": sum(1 for s in shards if s.get("status") == "done"),
+        "shards_total": len(shards),
+        "leases": {p.name: read_lease(str(p)) for p in shard_paths if read_lease(str(p))},
+        "linked": linked,
+        "status": manifest["status"]
+    }
+
+
+def show_status(manifest_path: str, analytics: bool = False, duplicates: bool = False):
     """Show detailed status of batch processing."""
     manifest = load_manifest(manifest_path)
 
-    stats = {"pending": 0, "parsed": 0, "rewritten": 0, "updated": 0, "failed": 0}
+    stats = {"pending": 0, "parsed": 0, "rewritten": 0, "updated": 0, "failed": 0, "timeout": 0}
     total_sections = 0
 
     for f in manifest["files"]:
         status = f.get("status", "pending")
         stats[status] = stats.get(status, 0) + 1
-        total_sections += f.get("sections", 0)
+        if not f.get("duplicate_of"):
+            total_sections += f.get("sections", 0)
 
     print(f"\n📊 Batch Status: {manifest['status'].upper()}")
     print(f"   Source: {manifest['source_folder']}")
@@ -291,6 +1098,14 @@ def show_status(manifest_path: str):
     print(f"   ✍️  Rewritten: {stats['rewritten']}")
     print(f"   ✅ Updated: {stats['updated']}")
     print(f"   ❌ Failed: {stats['failed']}")
+    if stats['timeout']:
+        print(f"   ⏱  Timeout: {stats['timeout']} (retry with --resume ... --retry-timeouts)")
+    duplicates_linked = sum(1 for f in manifest["files"] if f.get("duplicate_of"))
+    if duplicates_linked:
+        canonicals = len({f["duplicate_of"] for f in manifest["files"] if f.get("duplicate_of")})
+        print(f"   🔗 Identical copies: {duplicates_linked} linked to {canonicals} canonical pages (parsed once)")
+
+    print_telemetry(read_telemetry(Path(manifest_path).resolve().parent))
 
     if stats['failed'] > 0:
         print("\n❌ Failed files:")
@@ -298,11 +1113,28 @@ def show_status(manifest_path: str):
             if f.get("status") == "failed":
                 print(f"   - {f['relative_path']}: {f.get('error', 'Unknown')}")
 
+    if stats['timeout'] > 0:
+        print("\n⏱  Timed-out files:")
+        for f in manifest["files"]:
+            if f.get("status") == "timeout":
+                print(f"   - {f['relative_path']}: budget {f.get('timeout_budget', '?')}s")
+
     # Show next steps
     if stats['parsed'] > 0 and stats['rewritten'] == 0:
-        print(f"\n📝 Next: Rewrite content using html-rewriter.py on meta files")
+        print("\n📝 Next: Rewrite content using html-rewriter.py on meta files")
         print(f"   Example: python html-rewriter.py {manifest['output_dir']}/<name>_meta.json")
 
+    if analytics:
+        from nova_analytics import compute_report, load_columns, print_report
+        try:
+            print_report(compute_report(load_columns(manifest_path)))
+        except RuntimeError as e:
+            print(f"\n⚠️ {e}")
+
+    if duplicates:
+        from nova_duplicates import duplicate_report, print_duplicates
+        print_duplicates(duplicate_report(manifest_path))
+
 
 def list_files(manifest_path: str, status_filter: str = None):
     """List files in manifest with optional status filter."""
@@ -315,9 +1147,11 @@ def list_files(manifest_path: str, status_filter: str = None):
         if status_filter and file_status != status_filter:
             continue
 
-        icon = {"pending": "⏳", "parsed": "📄", "rewritten": "✍️", "updated": "✅", "failed": "❌"}.get(file_status, "?")
+        icon = {"pending": "⏳", "parsed": "📄", "rewritten": "✍️", "updated": "✅", "failed": "❌",
+                "timeout": "⏱"}.get(file_status, "?")
         sections = f.get("sections", 0)
-        print(f"  {icon} [{file_status:10}] {f['relative_path']} ({sections} sections)")
+        linked = f" = {Path(f['duplicate_of']).relative_to(manifest['source_folder'])}" if f.get("duplicate_of") else ""
+        print(f"  {icon} [{file_status:10}] {f['relative_path']} ({sections} sections){linked}")
 
 
 def main():
@@ -335,11 +1169,37 @@ Examples:
   # Resume from manifest
   python batch-processor.py --resume /output/batch_manifest.json
 
-  # Check status
+  # Byte-identical copies (locale mirrors, AMP, archives) are parsed once and linked; opt out with
+  python batch-processor.py /path/to/folder --no-dedupe
+
+  # Ship only what changed: updated pages whose bytes differ from the backup, plus a reverse bundle
+  python batch-processor.py --export /output/batch_manifest.json [--bundle /deploy/site-v2 --compression gz]
+
+  # Exclude template blocks repeated across pages (promo bars, sidebars, related posts)
+  python batch-processor.py /path/to/folder --boilerplate [--boilerplate-threshold 0.5]
+
+  # Top pages first (priority list or sitemap.xml), then the rest largest-first
+  python batch-processor.py /path/to/folder --priority sitemap.xml --top 50
+  python batch-processor.py --resume /output/batch_manifest.json --workers 4
+
+  # Isolated workers with per-file limits; later retry "timeout" files with a doubled budget
+  python batch-processor.py /path/to/folder --workers 4 --timeout 60 --max-tasks 200 --max-rss 800
+  python batch-processor.py --resume /output/batch_manifest.json --retry-timeouts --timeout 60
+
+  # Check status (add --analytics for length/format compliance, needs numpy;
+  # --duplicates for titles/descriptions/H1/H2 shared across pages)
   python batch-processor.py --status /output/batch_manifest.json
 
   # List parsed files
   python batch-processor.py --list /output/batch_manifest.json --filter parsed
+
+  # Watch folder and parse new/changed files as they arrive
+  python batch-processor.py /path/to/folder --watch
+
+  # Sharded run on several nodes sharing /output
+  python batch-processor.py --shard /output/batch_manifest.json --shards 16
+  python batch-processor.py --worker /output/shards        # on every node
+  python batch-processor.py --merge /output/shards
         """
     )
     parser.add_argument('folder', nargs='?', help='Folder containing HTML files (processes all subfolders)')
@@ -347,13 +1207,66 @@ Examples:
     parser.add_argument('--resume', help='Resume from existing manifest')
     parser.add_argument('--status', help='Show status of batch manifest')
     parser.add_argument('--list', help='List files in manifest')
-    parser.add_argument('--filter', help='Filter by status (pending/parsed/rewritten/updated/failed)')
+    parser.add_argument('--filter', help='Filter by status (pending/parsed/rewritten/updated/failed/timeout)')
+    parser.add_argument('--analytics', action='store_true',
+                        help='With --status: word/char distributions and format-budget violations (needs numpy)')
+    parser.add_argument('--duplicates', action='store_true',
+                        help='With --status: duplicate/near-duplicate titles, descriptions, H1 and H2 across pages')
+    parser.add_argument('--parser', choices=['auto'] + PARSER_ENGINES,
+                        help='Parser engine (default: $NOVA_HTML_PARSER or auto = lxml if installed)')
+    parser.add_argument('--meta-format', choices=list(META_FORMATS),
+                        help='Meta file format: json (default, editable), compact (.jsonl), compact-gz (.jsonl.gz)')
+    parser.add_argument('--shard', metavar='MANIFEST', help='Split manifest into shard files for multi-node runs')
+    parser.add_argument('--shards', type=int, default=8, help='Number of shards for --shard (default: 8)')
+    parser.add_argument('--worker', metavar='SHARDS_DIR', help='Claim and parse shards until all are done')
+    parser.add_argument('--worker-id', help='Worker name in lease files (default: <hostname>-<pid>)')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                        help=f'Shard lease seconds before others may take over (default: {DEFAULT_LEASE_SECONDS})')
+    parser.add_argument('--merge', metavar='SHARDS_DIR', help='Consolidate shard results into the manifest')
+    parser.add_argument('--export', metavar='MANIFEST',
+                        help='Bundle only updated pages that differ from their backup (+ a rollback bundle)')
+    parser.add_argument('--bundle', metavar='PATH',
+                        help='Bundle path without suffix (default: <manifest dir>/bundle-<timestamp>)')
+    parser.add_argument('--compression', choices=COMPRESSIONS, default='auto',
+                        help='Bundle compression: zst (needs zstandard), gz, auto = zst if installed')
+    parser.add_argument('--workers', type=int, default=1, help='Parse in N isolated worker processes (default: 1)')
+    parser.add_argument('--timeout', type=float, default=0,
+                        help='Per-file wall-clock limit in seconds; overruns get status "timeout" (default: none)')
+    parser.add_argument('--retry-timeouts', action='store_true',
+                        help=f'Re-queue "timeout" files with {TIMEOUT_BACKOFF}x their previous budget')
+    parser.add_argument('--max-tasks', type=int, default=0, help='Restart a worker after N files (default: never)')
+    parser.add_argument('--max-rss', type=float, default=0, help='Restart a worker once its RSS passes N MB')
+    parser.add_argument('--memory-limit', type=float, default=0,
+                        help='Per-worker address-space limit in MB; files exceeding it fail with MemoryError')
+    parser.add_argument('--order', choices=SCHEDULE_ORDERS,
+                        help='Work order: path, largest (load balancing) or priority (top pages first, then largest); '
+                             'default: manifest order or path')
+    parser.add_argument('--priority', metavar='FILE',
+                        help='Priority list (one path/URL per line, most important first) or sitemap.xml; implies --order priority')
+    parser.add_argument('--top', type=int, default=0, help='Only parse the first N scheduled files in this run')
+    parser.add_argument('--boilerplate', action='store_true',
+                        help='Learn template boilerplate across pages (cached in <output>/boilerplate.json) and exclude it')
+    parser.add_argument('--boilerplate-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Share of pages a block must appear on to count as boilerplate (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--boilerplate-sample', type=int, default=DEFAULT_SAMPLE,
+                        help=f'Pages read by the learning pass (default: {DEFAULT_SAMPLE}, 0 = all)')
+    parser.add_argument('--relearn', action='store_true', help='Ignore cached boilerplate rules and learn again')
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help='Parse byte-identical files separately instead of linking copies to one canonical meta')
+    parser.add_argument('--metrics-interval', type=float, default=DEFAULT_FLUSH_SECONDS,
+                        help=f'Seconds between telemetry file refreshes (default: {DEFAULT_FLUSH_SECONDS:g})')
+    parser.add_argument('--prometheus', action='store_true',
+                        help='Also write a Prometheus textfile (<output>/telemetry/<name>.prom)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and parse created/modified files, drop deleted ones')
+    parser.add_argument('--interval', type=float, default=2.0, help='Watch poll interval in seconds (default: 2)')
+    parser.add_argument('--debounce', type=float, default=1.0, help='Watch quiet period before parsing (default: 1)')
 
     args = parser.parse_args()
 
     # Status command
     if args.status:
-        show_status(args.status)
+        show_status(args.status, args.analytics, args.duplicates)
         return
 
     # List command
@@ -361,6 +1274,58 @@ Examples:
         list_files(args.list, args.filter)
         return
 
+    # Shard commands
+    if args.shard:
+        try:
+            paths = shard_manifest(args.shard, args.shards, args.order, args.priority)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"📦 {len(paths)} shards → {Path(args.shard).resolve().parent / SHARD_DIR_NAME}")
+        return
+
+    if args.worker:
+        try:
+            results = run_shard_worker(args.worker, args.worker_id, args.lease, args.parser,
+                                       args.metrics_interval, args.prometheus, args.workers, args.timeout,
+                                       args.max_tasks, args.max_rss, args.memory_limit)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"\n✅ Worker done: {results['shards']} shards, {results['parsed']} parsed, {results['failed']} failed, "
+              f"{results['timeout']} timed out")
+        return
+
+    if args.merge:
+        merged = merge_shards(args.merge)
+        print(f"📋 Merged {merged['shards_done']}/{merged['shards_total']} done shards → {merged['manifest']}")
+        print(f"   Status: {merged['status']}")
+        if merged["linked"]:
+            print(f"   🔗 Linked {merged['linked']} duplicate copies")
+        for name, lease in merged["leases"].items():
+            print(f"   🔒 {name}: {lease.get('worker')} (lease until {datetime.fromtimestamp(lease['expires_at']):%H:%M:%S})")
+        return
+
+    if args.export:
+        try:
+            result = export_bundle(args.export, args.bundle, args.compression)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print_bundle_result(result)
+        return
+
+    # Watch command
+    if args.watch:
+        if not args.folder:
+            parser.error('--watch requires a folder')
+        try:
+            watch_folder(args.folder, args.output, args.parser, args.interval, args.debounce, args.meta_format)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        return
+
     # Process command
     if not args.folder and not args.resume:
         parser.print_help()
@@ -368,22 +1333,48 @@ Examples:
 
     folder = args.folder or str(Path(args.resume).parent.parent)
 
-    result = process_folder(
-        folder=folder,
-        output_dir=args.output,
-        resume=args.resume
-    )
+    try:
+        result = process_folder(
+            folder=folder,
+            output_dir=args.output,
+            resume=args.resume,
+            parser=args.parser,
+            meta_format=args.meta_format,
+            metrics_interval=args.metrics_interval,
+            prometheus=args.prometheus,
+            workers=args.workers,
+            timeout=args.timeout,
+            max_tasks=args.max_tasks,
+            max_rss_mb=args.max_rss,
+            memory_limit_mb=args.memory_limit,
+            retry_timeouts=args.retry_timeouts,
+            order=args.order,
+            priority_file=args.priority,
+            top=args.top,
+            boilerplate=args.boilerplate,
+            boilerplate_threshold=args.boilerplate_threshold,
+            boilerplate_sample=args.boilerplate_sample,
+            relearn=args.relearn,
+            dedupe=not args.no_dedupe
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
 
     if "error" in result:
         sys.exit(1)
 
     print(f"\n{'='*50}")
-    print(f"✅ Batch parsing complete!")
+    print("✅ Batch parsing complete!")
     print(f"   Parsed: {result['results']['parsed']}")
     print(f"   Failed: {result['results']['failed']}")
+    if result['results']['linked']:
+        print(f"   Linked duplicates: {result['results']['linked']}")
+    if result['results']['timeout']:
+        print(f"   Timeout: {result['results']['timeout']}")
     print(f"   Skipped: {result['results']['skipped']}")
     print(f"\n📋 Manifest: {result['manifest']}")
-    print(f"\n📝 Next: Run html-rewriter.py on meta files, then html-updater.py")
+    print("\n📝 Next: Run html-rewriter.py on meta files, then html-updater.py")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Startup latency benchmark
+Compares N subprocess calls of html-parser.py / html-updater.py against
+the same N requests sent to one `nova.py serve` process, for the per-page
+commands an orchestrator runs: parse, update (after a simulated rewrite) and
+rollback. `nova.py apply` is left out: it is one call per batch, so its
+startup is already paid once.
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from nova_common import load_meta_file, save_meta_file
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+SAMPLE_HTML = """<html><head><title>Hướng dẫn chơi Baccarat</title>
+<meta name="description" content="Tìm hiểu luật chơi Baccarat cơ bản."></head>
+<body><main>
+<p>Baccarat là trò chơi bài phổ biến tại các sòng bài trực tuyến.</p>
+<h2>Luật chơi cơ bản</h2>
+<p>Người chơi đặt cược vào cửa Player, Banker hoặc Tie trước khi chia bài.</p>
+<p>Bên có tổng điểm gần 9 nhất sẽ thắng ván bài đó.</p>
+<h2>Chơi có trách nhiệm</h2>
+<p>Hãy đặt giới hạn thời gian và ngân sách trước khi bắt đầu chơi.</p>
+</main></body></html>
+"""
+
+
+def mark_rewritten(work: Path, n: int):
+    """Stand-in for the rewrite step so update has something to apply."""
+    for i in range(n):
+        meta_path = work / "meta" / f"page{i}_meta.json"
+        metadata = load_meta_file(meta_path)
+        metadata['status'] = 'rewritten'
+        metadata['rewritten_title'] = "Luật chơi Baccarat cho người mới"
+        metadata['sections'][0]['rewritten_content'] = "Baccarat là trò chơi bài quen thuộc tại sòng bài trực tuyến."
+        save_meta_file(meta_path, metadata)
+
+
+def bench_subprocess(work: Path, n: int) -> dict:
+    """One interpreter per call, as orchestrators do today."""
+    timings = {}
+
+    start = time.perf_counter()
+    for i in range(n):
+        subprocess.run([sys.executable, str(SCRIPTS_DIR / "html-parser.py"), str(work / f"page{i}.html"),
+                        "-o", str(work / "meta")], check=True, stdout=subprocess.DEVNULL)
+    timings["parse"] = (time.perf_counter() - start) / n
+
+    mark_rewritten(work, n)
+    start = time.perf_counter()
+    for i in range(n):
+        subprocess.run([sys.executable, str(SCRIPTS_DIR / "html-updater.py"), str(work / "meta" / f"page{i}_meta.json")],
+                       check=True, stdout=subprocess.DEVNULL)
+    timings["update"] = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    for i in range(n):
+        subprocess.run([sys.executable, str(SCRIPTS_DIR / "html-updater.py"), str(work / "meta" / f"page{i}_meta.json"),
+                        "--rollback"], check=True, stdout=subprocess.DEVNULL)
+    timings["rollback"] = (time.perf_counter() - start) / n
+    return timings
+
+
+def bench_server(work: Path, n: int, workers: int) -> dict:
+    """One warm `nova.py serve` process for all calls (includes its own startup)."""
+    timings = {}
+    requests = {
+        "parse": lambda i: {"op": "parse", "html_file": str(work / f"page{i}.html"), "output": str(work / "meta")},
+        "update": lambda i: {"op": "update", "meta_file": str(work / "meta" / f"page{i}_meta.json")},
+        "rollback": lambda i: {"op": "rollback", "meta_file": str(work / "meta" / f"page{i}_meta.json")},
+    }
+
+    for op, make_request in requests.items():
+        if op == "update":
+            mark_rewritten(work, n)
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, str(SCRIPTS_DIR / "nova.py"), "serve", "--workers", str(workers)],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        payload = "".join(json.dumps(dict(make_request(i), id=i)) + "\n" for i in range(n))
+        out, _ = proc.communicate(payload)
+        failed = [r for r in map(json.loads, out.splitlines()) if not r["ok"]]
+        if failed:
+            raise RuntimeError(f"serve request failed: {failed[0]['error']}")
+        timings[op] = (time.perf_counter() - start) / n
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-call startup: scripts vs nova.py serve')
+    parser.add_argument('-n', type=int, default=20, help='Calls per operation (default: 20)')
+    parser.add_argument('--workers', type=int, default=1, help='Server worker processes (default: 1)')
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="nova-bench-"))
+    try:
+        for i in range(args.n):
+            (work / f"page{i}.html").write_text(SAMPLE_HTML, encoding='utf-8')
+        scripts = bench_subprocess(work, args.n)
+        server = bench_server(work, args.n, args.workers)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(f"\n⏱  {args.n} calls per operation (ms per call)")
+    print(f"   {'op':10} {'scripts':>10} {'serve':>10} {'speedup':>8}")
+    for op in scripts:
+        print(f"   {op:10} {scripts[op] * 1000:10.1f} {server[op] * 1000:10.1f} {scripts[op] / server[op]:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,20 @@ Extracts content as sections (heading + paragraphs) for batch rewriting.
 """
 
 import argparse
-import json
+import importlib.util
 import shutil
 import sys
 from datetime import datetime
 from pathlib import Path
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
+if importlib.util.find_spec('bs4') is None:
     print("ERROR: beautifulsoup4 required. Install: pip install beautifulsoup4")
     sys.exit(1)
 
+from nova_boilerplate import load_rules, strip_boilerplate, strip_fixed_tags
+from nova_common import (META_FORMATS, PARSER_ENGINES, kept_backup, make_soup, meta_filename, parse_with_fallback,
+                         read_html, resolve_parser, save_meta_file)
+
 
 def create_backup(html_path: str) -> str:
     """Create backup of original HTML for rollback."""
@@ -26,6 +28,11 @@ def create_backup(html_path: str) -> str:
     timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     backup_name = f"{Path(html_path).stem}_{timestamp}.html.bak"
     backup_path = backup_dir / backup_name
+    n = 1
+    while backup_path.exists():
+        # Never overwrite an earlier backup taken in the same second
+        backup_path = backup_dir / f"{Path(html_path).stem}_{timestamp}-{n}.html.bak"
+        n += 1
 
     shutil.copy2(html_path, backup_path)
     return str(backup_path)
@@ -41,10 +48,10 @@ def get_heading_level(tag_name: str) -> int:
     return 0
 
 
-def extract_sections(html_path: str) -> dict:
-    """Extract content as sections (heading + following content)."""
-    with open(html_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+def extract_sections(html_path: str, parser: str = 'html.parser', boilerplate: dict = None) -> dict:
+    """Extract content as sections (heading + following content), minus learned boilerplate rules."""
+    markup, encoding = read_html(html_path)
+    soup, parser = parse_with_fallback(markup, parser)
 
     # Extract meta info
     title = ""
@@ -58,15 +65,16 @@ def extract_sections(html_path: str) -> dict:
         description = meta_desc.get('content', '')
 
     # Create working copy for extraction
-    content_soup = BeautifulSoup(str(soup), 'html.parser')
+    content_soup = make_soup(str(soup), parser)
 
     # Remove non-content elements
-    for tag in content_soup(['script', 'style', 'nav', 'footer', 'aside', 'noscript', 'iframe', 'header']):
-        tag.decompose()
+    strip_fixed_tags(content_soup)
 
     body = content_soup.find('body')
     if not body:
-        return {"sections": [], "title": title, "description": description}
+        return {"sections": [], "title": title, "description": description, "parser": parser,
+                "source_encoding": encoding}
+    boilerplate_removed = strip_boilerplate(body, boilerplate)
 
     # Find main content area
     main_content = (
@@ -137,6 +145,9 @@ def extract_sections(html_path: str) -> dict:
         "title": title,
         "description": description,
         "sections": sections,
+        "parser": parser,
+        "source_encoding": encoding,
+        "boilerplate_removed": boilerplate_removed,
         "extracted_at": datetime.now().isoformat()
     }
 
@@ -150,12 +161,14 @@ def save_metadata(data: dict, backup_path: str, meta_path: str):
         "original_description": data['description'],
         "sections": data['sections'],
         "total_sections": len(data['sections']),
+        "parser": data.get('parser', 'html.parser'),
+        "source_encoding": data.get('source_encoding', 'utf-8'),
+        "boilerplate_removed": data.get('boilerplate_removed', 0),
         "extracted_at": data['extracted_at'],
         "status": "pending_rewrite"
     }
 
-    with open(meta_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    save_meta_file(meta_path, metadata)
 
 
 def print_sections_summary(sections: list):
@@ -173,28 +186,53 @@ def main():
     parser = argparse.ArgumentParser(description='Parse HTML into sections for i-Gaming content rewriting')
     parser.add_argument('html_file', help='Path to HTML file to parse')
     parser.add_argument('-o', '--output', help='Output directory (default: same as input)')
+    parser.add_argument('--parser', choices=['auto'] + PARSER_ENGINES,
+                        help='Parser engine (default: $NOVA_HTML_PARSER or auto = lxml if installed)')
+    parser.add_argument('--meta-format', choices=list(META_FORMATS), default='json',
+                        help='Meta file format: json (editable), compact (.jsonl), compact-gz (.jsonl.gz)')
+    parser.add_argument('--boilerplate', metavar='RULES',
+                        help='Learned boilerplate rules to exclude (boilerplate.json from batch-processor --boilerplate)')
     args = parser.parse_args()
 
+    try:
+        engine = resolve_parser(args.parser)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
     html_path = Path(args.html_file).resolve()
     if not html_path.exists():
         print(f"ERROR: File not found: {html_path}")
         sys.exit(1)
 
+    boilerplate = None
+    if args.boilerplate:
+        boilerplate = load_rules(args.boilerplate)
+        if boilerplate is None:
+            print(f"ERROR: Cannot read boilerplate rules: {args.boilerplate}")
+            sys.exit(1)
+
     output_dir = Path(args.output) if args.output else html_path.parent
     output_dir.mkdir(parents=True, exist_ok=True)
 
     base_name = html_path.stem
-    meta_path = output_dir / f"{base_name}_meta.json"
+    meta_path = output_dir / meta_filename(base_name, args.meta_format)
 
     print(f"Đang phân tích: {html_path}")
 
-    # Create backup
-    backup_path = create_backup(str(html_path))
-    print(f"Đã tạo bản sao lưu: {backup_path}")
+    # Create backup (a re-parse keeps the backup of the original)
+    backup_path = kept_backup(meta_path, html_path)
+    if backup_path:
+        print(f"Giữ bản sao lưu gốc: {backup_path}")
+    else:
+        backup_path = create_backup(str(html_path))
+        print(f"Đã tạo bản sao lưu: {backup_path}")
 
     # Extract sections
-    data = extract_sections(str(html_path))
-    print(f"Đã trích xuất: {len(data['sections'])} sections")
+    data = extract_sections(str(html_path), engine, boilerplate)
+    print(f"Đã trích xuất: {len(data['sections'])} sections (parser: {data['parser']})")
+    if data.get('boilerplate_removed'):
+        print(f"Đã loại bỏ {data['boilerplate_removed']} khối boilerplate")
 
     # Print summary
     print_sections_summary(data['sections'])
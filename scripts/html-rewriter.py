@@ -7,14 +7,50 @@ Creates a template file that Claude Code can process directly.
 import argparse
 import json
 import sys
-from datetime import datetime
 from pathlib import Path
 
+from nova_analytics import FORMAT_BUDGETS
+from nova_common import load_meta_file, load_meta_header, load_meta_section, save_meta_sections, update_meta_header
+
+# Fields a rewrite may set; everything else in the meta file belongs to the parser/updater.
+# output_format (MICRO_EXP / EXP-LITE / EXP) declares the word budget nova.py analytics checks.
+HEADER_FIELDS = ('rewritten_title', 'rewritten_description', 'output_format')
+SECTION_FIELDS = ('rewritten_heading', 'rewritten_content', 'output_format')
+
+
+def save_rewrites(meta_path: str, rewrites: dict) -> int:
+    """
+    Store rewritten fields in the meta file (any format) without hand-editing it:
+      {"rewritten_title": "...", "rewritten_description": "...", "output_format": "EXP-LITE",
+       "sections": [{"index": 1, "rewritten_heading": "...", "rewritten_content": "...",
+                     "output_format": "MICRO_EXP"}]}
+    Compact files get their offsets and header counters rebuilt. Returns sections saved.
+    """
+    for item in [rewrites] + list(rewrites.get('sections', [])):
+        if item.get('output_format') and item['output_format'] not in FORMAT_BUDGETS:
+            raise ValueError(f"Unknown output_format '{item['output_format']}' (choose: {', '.join(FORMAT_BUDGETS)})")
+    fields = {k: rewrites[k] for k in HEADER_FIELDS if rewrites.get(k)}
+    if fields:
+        if load_meta_header(meta_path).get('status') != 'updated':
+            fields['status'] = 'rewritten'
+        update_meta_header(meta_path, **fields)
+
+    sections = {}
+    for item in rewrites.get('sections', []):
+        section = load_meta_section(meta_path, int(item['index']))
+        section.update({k: item[k] for k in SECTION_FIELDS if item.get(k)})
+        sections[int(item['index'])] = section
+    if sections:
+        save_meta_sections(meta_path, sections)
+    return len(sections)
+
 
 def main():
     parser = argparse.ArgumentParser(description='Prepare sections for Claude Code rewriting')
     parser.add_argument('meta_file', help='Path to metadata JSON from html-parser.py')
     parser.add_argument('--sections', type=str, help='Comma-separated section indices (e.g., "0,1,2")')
+    parser.add_argument('--save', metavar='REWRITES_JSON',
+                        help='Store rewritten title/description/sections from a JSON file into the meta file')
     args = parser.parse_args()
 
     meta_path = Path(args.meta_file).resolve()
@@ -22,17 +58,32 @@ def main():
         print(f"ERROR: Metadata file not found: {meta_path}")
         sys.exit(1)
 
-    with open(meta_path, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
-
-    sections = metadata.get('sections', [])
+    if args.save:
+        try:
+            with open(args.save, 'r', encoding='utf-8') as f:
+                saved = save_rewrites(str(meta_path), json.load(f))
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        header = load_meta_header(str(meta_path))
+        print(f"✅ Đã lưu {saved} sections ({header.get('rewritten_sections', 0)}/{header.get('total_sections', 0)} "
+              f"đã viết lại, status: {header.get('status')})")
+        return
 
     # Parse section filter
     section_filter = None
     if args.sections:
         section_filter = set(int(x.strip()) for x in args.sections.split(','))
 
-    print(f"📄 Loaded {len(sections)} sections")
+    if section_filter:
+        # Only fetch the requested sections (compact meta files seek to them directly)
+        header = load_meta_header(str(meta_path))
+        sections = [load_meta_section(str(meta_path), i) for i in sorted(section_filter)
+                    if 0 <= i < header.get('total_sections', 0)]
+        print(f"📄 Loaded {len(sections)}/{header.get('total_sections', 0)} sections")
+    else:
+        sections = load_meta_file(str(meta_path)).get('sections', [])
+        print(f"📄 Loaded {len(sections)} sections")
     print("\n" + "="*60)
     print("Hãy sử dụng Claude Code để viết lại các sections sau:")
     print("="*60)
@@ -48,9 +99,10 @@ def main():
             print(f"  - {para['text'][:100]}..." if len(para['text']) > 100 else f"  - {para['text']}")
 
     print("\n" + "="*60)
-    print("Sau khi viết lại, lưu vào metadata với format:")
-    print('  section["rewritten_heading"] = "..."')
-    print('  section["rewritten_content"] = "..."')
+    print("Sau khi viết lại, ghi vào một file JSON rồi lưu bằng --save (không sửa tay file meta):")
+    print('  {"rewritten_title": "...", "rewritten_description": "...",')
+    print('   "sections": [{"index": 0, "rewritten_heading": "...", "rewritten_content": "..."}]}')
+    print(f"  python html-rewriter.py {meta_path} --save rewrites.json")
     print("="*60)
 
 
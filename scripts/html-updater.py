@@ -5,18 +5,33 @@ Replaces content by matching sections (heading + paragraphs).
 """
 
 import argparse
+import hashlib
 import json
+import re
 import shutil
 import sys
 from datetime import datetime
 from pathlib import Path
 
 try:
-    from bs4 import BeautifulSoup, NavigableString
+    from bs4 import NavigableString
 except ImportError:
     print("ERROR: beautifulsoup4 required. Install: pip install beautifulsoup4")
     sys.exit(1)
 
+from nova_common import (DEFAULT_PARSER, encode_html, file_hash, load_meta_file, load_meta_header, make_soup,
+                         parser_available, read_html, update_meta_header, write_if_changed)
+from nova_workers import OK, FileWorkerPool
+
+# Paragraph alignment: pairs below MIN_SIMILARITY are never aligned,
+# pairs below MIN_CONFIDENCE are aligned but reported instead of overwritten
+ALIGN_MIN_SIMILARITY = 0.1
+ALIGN_MIN_CONFIDENCE = 0.5
+_WORD_RE = re.compile(r'\w+')
+
+# Meta statuses an update may be (re-)applied from
+APPLICABLE_STATUSES = {'rewritten', 'updated'}
+
 
 def find_heading_element(soup, heading_text: str, heading_tag: str):
     """Find heading element by matching text content."""
@@ -75,19 +90,51 @@ def get_section_paragraphs(heading_element, next_heading_tags=['h1', 'h2', 'h3',
     return paragraphs
 
 
-def find_paragraph_by_text(paragraphs, target_text: str):
-    """Find paragraph by fuzzy text matching."""
-    normalized_target = ' '.join(target_text.split())[:100]  # First 100 chars
-
-    for p in paragraphs:
-        p_text = ' '.join(p.get_text(strip=True).split())[:100]
-        # Fuzzy match: check if significant overlap
-        if normalized_target[:50] == p_text[:50]:
-            return p
-        # Also try contains match for shorter texts
-        if len(normalized_target) > 20 and normalized_target[:30] in p_text:
-            return p
-    return None
+def paragraph_shingles(text: str, size: int = 3) -> set:
+    """Normalized word shingles (lowercased word n-grams) for similarity scoring."""
+    tokens = _WORD_RE.findall(text.lower())
+    if len(tokens) < size:
+        return set(tokens)
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def shingle_similarity(a: set, b: set) -> float:
+    """Jaccard similarity of two shingle sets (0.0 - 1.0)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def align_paragraphs(original_texts: list, candidates: list) -> list:
+    """
+    Order-preserving alignment of original paragraph texts to DOM paragraphs
+    (sequence-alignment DP maximizing total similarity).
+    Returns [(original_index, candidate_index, score)] in document order.
+    """
+    orig = [paragraph_shingles(t) for t in original_texts]
+    cand = [paragraph_shingles(p.get_text(strip=True)) for p in candidates]
+    n, m = len(orig), len(cand)
+    sim = [[shingle_similarity(o, c) for c in cand] for o in orig]
+
+    # best[i][j] = best total score aligning orig[:i] with cand[:j]
+    best = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            take = best[i - 1][j - 1] + sim[i - 1][j - 1] if sim[i - 1][j - 1] >= ALIGN_MIN_SIMILARITY else -1.0
+            best[i][j] = max(best[i - 1][j], best[i][j - 1], take)
+
+    pairs = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        score = sim[i - 1][j - 1]
+        if score >= ALIGN_MIN_SIMILARITY and best[i][j] == best[i - 1][j - 1] + score:
+            pairs.append((i - 1, j - 1, score))
+            i, j = i - 1, j - 1
+        elif best[i][j] == best[i - 1][j]:
+            i -= 1
+        else:
+            j -= 1
+    return pairs[::-1]
 
 
 def replace_element_text(element, new_text: str) -> bool:
@@ -159,9 +206,9 @@ def find_first_content_paragraph(soup):
     return None
 
 
-def update_section(soup, section: dict) -> dict:
+def update_section(soup, section: dict, min_confidence: float = ALIGN_MIN_CONFIDENCE) -> dict:
     """Update a single section in the HTML."""
-    stats = {"heading": False, "paragraphs": 0}
+    stats = {"heading": False, "paragraphs": 0, "low_confidence": [], "unmatched": []}
 
     heading_text = section.get('heading_text', '')
     heading_tag = section.get('heading_tag')
@@ -200,26 +247,24 @@ def update_section(soup, section: dict) -> dict:
             # Handle remaining paragraphs if any
             rewritten_paragraphs = rewritten_paragraphs[1:]
 
-    # Strategy 1: Try to find section paragraphs by position (for main content)
+    # Strategy 1: Align original paragraphs to the section's DOM paragraphs (one ordered pass)
     if heading_element:
         section_paras = get_section_paragraphs(heading_element)
-
-        # Match original paragraphs to section paragraphs by text
-        for i, orig_para in enumerate(original_paragraphs):
-            if i >= len(rewritten_paragraphs):
-                break
-
-            # Try fuzzy match in section paragraphs
-            para_element = find_paragraph_by_text(section_paras, orig_para['text'])
-            if para_element:
-                if replace_element_text(para_element, rewritten_paragraphs[i]):
-                    stats["paragraphs"] += 1
-                    # Remove from list to avoid re-matching
-                    section_paras.remove(para_element)
-            # Fallback: replace by position if same count
-            elif i < len(section_paras):
-                if replace_element_text(section_paras[i], rewritten_paragraphs[i]):
-                    stats["paragraphs"] += 1
+        original_texts = [p['text'] for p in original_paragraphs[:len(rewritten_paragraphs)]]
+        matched = set()
+
+        for i, j, score in align_paragraphs(original_texts, section_paras):
+            if score < min_confidence:
+                # Too uncertain to overwrite: report instead
+                stats["low_confidence"].append({"paragraph": i, "score": round(score, 2),
+                                                "text": original_texts[i][:60]})
+                matched.add(i)
+                continue
+            if replace_element_text(section_paras[j], rewritten_paragraphs[i]):
+                stats["paragraphs"] += 1
+                matched.add(i)
+
+        stats["unmatched"] = [i for i in range(len(original_texts)) if i not in matched]
 
     # Strategy 2: For blog excerpts (h5), find by class
     if heading_tag == 'h5' and heading_element:
@@ -234,17 +279,30 @@ def update_section(soup, section: dict) -> dict:
     return stats
 
 
-def update_html(html_path: str, metadata: dict) -> dict:
-    """Update HTML with rewritten content."""
-    with open(html_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+def update_html(html_path: str, metadata: dict, min_confidence: float = ALIGN_MIN_CONFIDENCE,
+                base_path: str = None, copies: list = None) -> dict:
+    """
+    Update HTML with rewritten content, reading from base_path (e.g. the backup) if given.
+    Byte-identical copies of the page (see nova_dedupe) receive the same output.
+    Files are only written when their bytes change; stats carry "written", "copies_written"
+    and the resulting "page_hash".
+    """
+    # Parse with the same engine the parser used, so sections line up
+    engine = metadata.get('parser', DEFAULT_PARSER)
+    if not parser_available(engine):
+        raise RuntimeError(f"Parser '{engine}' recorded in metadata is not installed. Install: pip install {engine}")
+
+    markup, _ = read_html(base_path or html_path)
+    soup = make_soup(markup, engine)
 
     stats = {
         "title": False,
         "description": False,
         "sections": 0,
         "headings": 0,
-        "paragraphs": 0
+        "paragraphs": 0,
+        "low_confidence": [],
+        "unmatched": []
     }
 
     # Update title
@@ -266,11 +324,15 @@ def update_html(html_path: str, metadata: dict) -> dict:
         if not section.get('rewritten_content'):
             continue
 
-        section_stats = update_section(soup, section)
+        section_stats = update_section(soup, section, min_confidence)
         if section_stats["heading"] or section_stats["paragraphs"] > 0:
             stats["sections"] += 1
             stats["headings"] += 1 if section_stats["heading"] else 0
             stats["paragraphs"] += section_stats["paragraphs"]
+        for item in section_stats["low_confidence"]:
+            stats["low_confidence"].append(dict(item, section=section.get('index')))
+        for i in section_stats["unmatched"]:
+            stats["unmatched"].append({"section": section.get('index'), "paragraph": i})
 
     # Add responsible gaming notice
     existing_notice = soup.find(class_='responsible-gaming-notice')
@@ -288,17 +350,129 @@ def update_html(html_path: str, metadata: dict) -> dict:
 
         body.append(notice)
 
-    # Save HTML (minimal formatting to preserve original structure)
-    with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(str(soup))
+    # Save HTML (minimal formatting to preserve original structure) in the page's original encoding;
+    # legacy pages keep their own <meta charset>, everything else is declared utf-8 as before
+    encoding = metadata.get('source_encoding', 'utf-8')
+    markup = soup.decode(eventual_encoding='utf-8' if encoding.startswith('utf') else None)
+    data = encode_html(markup, encoding)
+    stats["written"] = write_if_changed(html_path, data)
+    stats["copies_written"] = sum(write_if_changed(path, data) for path in copies or [])
+    stats["page_hash"] = hashlib.sha256(data).hexdigest()
 
     return stats
 
 
+def payload_hash(metadata: dict, min_confidence: float = ALIGN_MIN_CONFIDENCE) -> str:
+    """Hash of everything update_html applies: same payload + same original page = same output."""
+    payload = {
+        "title": metadata.get('rewritten_title'),
+        "description": metadata.get('rewritten_description'),
+        "parser": metadata.get('parser', DEFAULT_PARSER),
+        "encoding": metadata.get('source_encoding', 'utf-8'),
+        "min_confidence": min_confidence,
+        "sections": [[s.get('index'), s.get('heading_tag'), s.get('heading_text'), s.get('rewritten_heading'),
+                      s.get('rewritten_content'), [p.get('text') for p in s.get('paragraphs', [])]]
+                     for s in metadata.get('sections', []) if s.get('rewritten_content')],
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def apply_update(meta_path: str, min_confidence: float = ALIGN_MIN_CONFIDENCE, force: bool = False,
+                 metadata: dict = None) -> tuple:
+    """
+    Incremental apply (metadata: the meta file already loaded by the caller). Returns (action, stats):
+      up_to_date          payload and page unchanged since the last successful update (nothing read or written)
+      updated / unchanged applied; the page was (re)written / rendered byte-identical and left alone
+      modified_externally the page changed outside the updater since the last update (use force)
+    Re-applies render from the backup, since the page already carries the previous rewrite.
+    Copies recorded in the meta follow the page while they still hold the original or the
+    last output; edited copies are listed in stats["copies_skipped"] (force overwrites them).
+    A page updated before the applied hashes were recorded is taken as up to date and its
+    hashes are backfilled from the current page (force re-renders it from the backup).
+    """
+    metadata = metadata or load_meta_file(meta_path)
+    if metadata.get('status') not in APPLICABLE_STATUSES:
+        raise ValueError("Content not yet rewritten. Run html-rewriter.py first.")
+
+    source = metadata['source_file']
+    digest = payload_hash(metadata, min_confidence)
+    applied = metadata.get('applied_page_hash')
+    legacy = metadata.get('status') == 'updated' and not applied
+    if legacy and not force:
+        # The page already carries the rewrite: applying it again would stack edits on edits
+        if Path(source).exists():
+            update_meta_header(meta_path, applied_payload_hash=digest, applied_page_hash=file_hash(source))
+        return 'up_to_date', metadata.get('update_stats')
+
+    page_hash = file_hash(source) if applied and Path(source).exists() else None
+    copies = {c['source_file']: file_hash(c['source_file']) for c in metadata.get('copies') or []
+              if Path(c['source_file']).exists()}
+    if (applied and not force and page_hash == applied and metadata.get('applied_payload_hash') == digest
+            and all(h == applied for h in copies.values())):
+        return 'up_to_date', metadata.get('update_stats')
+
+    original = file_hash(metadata['backup_path']) if applied or copies else None
+    base = None
+    if applied and page_hash != original:
+        if page_hash != applied and not force:
+            return 'modified_externally', None
+        base = metadata['backup_path']
+    elif legacy:
+        base = metadata['backup_path']
+
+    targets = [path for path, h in copies.items() if force or h in (original, applied)]
+    stats = update_html(source, metadata, min_confidence, base, targets)
+    stats['copies_skipped'] = sorted(set(copies) - set(targets))
+    update_metadata(meta_path, 'updated', stats, applied_payload_hash=digest, applied_page_hash=stats.pop('page_hash'))
+    return ('updated' if stats['written'] or stats['copies_written'] else 'unchanged'), stats
+
+
+def apply_rewritten(meta_path: str, min_confidence: float = ALIGN_MIN_CONFIDENCE, force: bool = False) -> tuple:
+    """apply_update with one meta load; ('not_rewritten', None) for a page with nothing to apply yet."""
+    metadata = load_meta_file(meta_path)
+    if metadata.get('status') not in APPLICABLE_STATUSES:
+        return 'not_rewritten', None
+    return apply_update(meta_path, min_confidence, force, metadata)
+
+
+def apply_pooled(meta_paths, on_result, workers: int = 1, timeout: float = 0, max_tasks: int = 0,
+                 max_rss_mb: float = 0, memory_limit_mb: float = 0, min_confidence: float = ALIGN_MIN_CONFIDENCE,
+                 force: bool = False):
+    """
+    apply_rewritten in recyclable worker processes, each page under the time/memory limits.
+    on_result(meta_path, action, stats) is called as pages finish; a page that raised, timed
+    out or took its worker down gets action 'failed' with the error instead of stats
+    (the caller rolls it back, as for an in-process failure).
+    """
+    def done(outcome):
+        if outcome["status"] == OK:
+            on_result(outcome["key"], *outcome["result"])
+        else:
+            on_result(outcome["key"], 'failed', outcome["error"])
+
+    tasks = ((path, (path, min_confidence, force), timeout) for path in meta_paths)
+    with FileWorkerPool(apply_rewritten, workers, max_tasks, max_rss_mb, memory_limit_mb) as pool:
+        pool.run(tasks, done)
+
+
+def apply_limited(meta_path: str, min_confidence: float = ALIGN_MIN_CONFIDENCE, force: bool = False,
+                  timeout: float = 0, memory_limit_mb: float = 0) -> tuple:
+    """apply_update for one page in a worker process; raises RuntimeError if it fails or overruns a limit."""
+    outcome = {}
+    apply_pooled([meta_path], lambda path, action, stats: outcome.update(action=action, stats=stats),
+                 timeout=timeout, memory_limit_mb=memory_limit_mb, min_confidence=min_confidence, force=force)
+    if outcome["action"] == 'failed':
+        raise RuntimeError(outcome["stats"])
+    return outcome["action"], outcome["stats"]
+
+
 def rollback(meta_path: str) -> bool:
-    """Rollback to original HTML from backup."""
-    with open(meta_path, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
+    """
+    Rollback to original HTML from backup. Returns False if the page's backup or any
+    copy's backup is missing (copies that can be restored still are), so the caller
+    doesn't record a rollback that left a copy rewritten.
+    """
+    metadata = load_meta_header(meta_path)
 
     backup_path = Path(metadata['backup_path'])
     source_path = Path(metadata['source_file'])
@@ -308,21 +482,26 @@ def rollback(meta_path: str) -> bool:
         return False
 
     shutil.copy2(backup_path, source_path)
-    return True
-
+    # Identical copies linked at parse time each go back to their own backup
+    restored = True
+    for copy in metadata.get('copies') or []:
+        if Path(copy['backup_path']).exists():
+            shutil.copy2(copy['backup_path'], copy['source_file'])
+        else:
+            print(f"ERROR: Backup not found for copy: {copy['source_file']}")
+            restored = False
+    return restored
 
-def update_metadata(meta_path: str, status: str, stats: dict = None):
-    """Update metadata status."""
-    with open(meta_path, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
 
-    metadata['status'] = status
-    metadata['updated_at'] = datetime.now().isoformat()
+def update_metadata(meta_path: str, status: str, stats: dict = None, **extra):
+    """Update metadata status (plus extra header fields such as the applied hashes)."""
+    fields = {'status': status, 'updated_at': datetime.now().isoformat(), **extra}
+    if status != 'updated':
+        # The page is back to its backup; a later apply must not compare against the old output
+        fields.update(applied_payload_hash=None, applied_page_hash=None)
     if stats:
-        metadata['update_stats'] = stats
-
-    with open(meta_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+        fields['update_stats'] = stats
+    update_meta_header(meta_path, **fields)
 
 
 def main():
@@ -330,6 +509,14 @@ def main():
     parser.add_argument('meta_file', help='Path to metadata JSON file')
     parser.add_argument('--rollback', action='store_true', help='Rollback to original HTML')
     parser.add_argument('--dry-run', action='store_true', help='Preview changes without applying')
+    parser.add_argument('--min-confidence', type=float, default=ALIGN_MIN_CONFIDENCE,
+                        help=f'Paragraph match score needed to overwrite (default: {ALIGN_MIN_CONFIDENCE})')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-apply even if already up to date or the page was edited since the last update')
+    parser.add_argument('--timeout', type=float, default=0,
+                        help='Wall-clock limit in seconds; the update runs in a worker process that is killed on overrun')
+    parser.add_argument('--memory-limit', type=float, default=0,
+                        help='Address-space limit in MB for the worker process running the update')
     args = parser.parse_args()
 
     meta_path = Path(args.meta_file).resolve()
@@ -337,8 +524,8 @@ def main():
         print(f"ERROR: Metadata file not found: {meta_path}")
         sys.exit(1)
 
-    with open(meta_path, 'r', encoding='utf-8') as f:
-        metadata = json.load(f)
+    # Rollback and status checks only need the header (cheap for compact meta files)
+    metadata = load_meta_header(str(meta_path))
 
     # Rollback mode
     if args.rollback:
@@ -351,11 +538,13 @@ def main():
             sys.exit(1)
         return
 
-    # Check if content was rewritten
-    if metadata.get('status') != 'rewritten':
+    # Check if content was rewritten (an updated page may be re-applied incrementally)
+    if metadata.get('status') not in APPLICABLE_STATUSES:
         print("⚠️ Content not yet rewritten. Run html-rewriter.py first.")
         sys.exit(1)
 
+    metadata = load_meta_file(str(meta_path))
+
     # Count rewritten sections
     rewritten_sections = [s for s in metadata.get('sections', []) if s.get('rewritten_content')]
 
@@ -374,18 +563,42 @@ def main():
             print(f"    ... và {len(rewritten_sections) - 5} sections khác")
         return
 
+    engine = metadata.get('parser', DEFAULT_PARSER)
+    if not parser_available(engine):
+        print(f"ERROR: Parser '{engine}' recorded in metadata is not installed. Install: pip install {engine}")
+        sys.exit(1)
+
     # Update HTML
     print(f"Đang cập nhật: {metadata['source_file']}")
     try:
-        stats = update_html(metadata['source_file'], metadata)
-        update_metadata(str(meta_path), 'updated', stats)
+        if args.timeout or args.memory_limit:
+            action, stats = apply_limited(str(meta_path), args.min_confidence, args.force,
+                                          args.timeout, args.memory_limit)
+        else:
+            action, stats = apply_update(str(meta_path), args.min_confidence, args.force, metadata)
+        if action == 'up_to_date':
+            print("✅ Đã cập nhật trước đó, nội dung và trang không đổi (bỏ qua). Dùng --force để áp dụng lại.")
+            return
+        if action == 'modified_externally':
+            print("⚠️ Trang đã bị sửa bên ngoài sau lần cập nhật trước. Dùng --force để áp dụng lại từ bản sao lưu.")
+            sys.exit(1)
 
-        print("✅ Cập nhật thành công!")
+        print("✅ Cập nhật thành công!" if action == 'updated' else "✅ Kết quả giống hệt trang hiện tại (không ghi lại).")
         print(f"   Tiêu đề: {'✓' if stats['title'] else '✗'}")
         print(f"   Mô tả: {'✓' if stats['description'] else '✗'}")
         print(f"   Sections: {stats['sections']}")
         print(f"   Headings: {stats['headings']}")
         print(f"   Paragraphs: {stats['paragraphs']}")
+        if metadata.get('copies'):
+            print(f"   Bản sao giống hệt: {stats['copies_written']}/{len(metadata['copies'])} đã ghi")
+            for path in stats['copies_skipped']:
+                print(f"   ⚠️ Bản sao đã bị sửa, bỏ qua (dùng --force): {path}")
+        if stats['low_confidence']:
+            print(f"\n⚠️ {len(stats['low_confidence'])} đoạn khớp không chắc chắn (không ghi đè):")
+            for item in stats['low_confidence'][:10]:
+                print(f"   [{item['section']}.{item['paragraph']}] score {item['score']}: {item['text']}")
+        if stats['unmatched']:
+            print(f"⚠️ {len(stats['unmatched'])} đoạn không tìm thấy trong HTML (xem update_stats trong metadata)")
         print(f"\n🔄 Để khôi phục: python html-updater.py {meta_path} --rollback")
 
     except Exception as e:
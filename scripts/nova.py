@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Nova unified entry point
+One process for parse / update / rollback / status, plus a JSON-lines server
+(`serve`) so orchestrators don't pay interpreter + bs4 startup per call.
+Heavy modules (bs4 and the hyphenated scripts) are only loaded on first use.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+OPERATIONS = ['parse', 'update', 'rollback', 'status']
+
+_modules = {}
+
+
+def load_script(name: str):
+    """Import a hyphenated script (e.g. 'html-parser') once per process."""
+    if name not in _modules:
+        if str(SCRIPTS_DIR) not in sys.path:
+            sys.path.insert(0, str(SCRIPTS_DIR))
+        spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+def _read_json(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_meta_path(req: dict) -> Path:
+    """Meta file a parse request writes."""
+    from nova_common import meta_filename
+    html_path = Path(req['html_file']).resolve()
+    output_dir = Path(req['output']) if req.get('output') else html_path.parent
+    return output_dir / meta_filename(html_path.stem, req.get('meta_format', 'json'))
+
+
+def request_target(req: dict):
+    """Meta file a request reads or writes (None for a manifest status), so requests on one page keep their order."""
+    try:
+        if req.get('meta_file'):
+            return str(Path(req['meta_file']).resolve())
+        if req.get('op') == 'parse' and req.get('html_file'):
+            return str(parse_meta_path(req).resolve())
+    except TypeError:
+        pass  # Malformed request: its handler reports the error
+    return None
+
+
+def op_parse(req: dict) -> dict:
+    """Backup + extract sections + write meta file (same as html-parser.py)."""
+    hp = load_script('html-parser')
+    from nova_common import resolve_parser
+
+    html_path = Path(req['html_file']).resolve()
+    if not html_path.exists():
+        raise FileNotFoundError(f"File not found: {html_path}")
+    meta_path = parse_meta_path(req)
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+
+    backup_path = hp.create_backup(str(html_path))
+    boilerplate = None
+    if req.get('boilerplate'):
+        from nova_boilerplate import load_rules
+        boilerplate = load_rules(req['boilerplate'])
+        if boilerplate is None:
+            raise ValueError(f"Cannot read boilerplate rules: {req['boilerplate']}")
+    data = hp.extract_sections(str(html_path), resolve_parser(req.get('parser')), boilerplate)
+    hp.save_metadata(data, backup_path, str(meta_path))
+    return {
+        "meta_file": str(meta_path),
+        "backup": backup_path,
+        "sections": len(data['sections']),
+        "parser": data['parser'],
+        "boilerplate_removed": data.get('boilerplate_removed', 0)
+    }
+
+
+def op_update(req: dict) -> dict:
+    """Apply rewritten content incrementally, auto-rollback on error (same as html-updater.py)."""
+    hu = load_script('html-updater')
+    from nova_common import load_meta_file
+    meta_path = str(Path(req['meta_file']).resolve())
+
+    metadata = load_meta_file(meta_path)
+    if metadata.get('status') not in hu.APPLICABLE_STATUSES:
+        raise ValueError("Content not yet rewritten. Run html-rewriter.py first.")
+
+    try:
+        action, stats = hu.apply_update(meta_path, force=bool(req.get('force')), metadata=metadata)
+    except Exception:
+        if hu.rollback(meta_path):
+            hu.update_metadata(meta_path, 'update_failed_rolled_back')
+        raise
+    return {"meta_file": meta_path, "action": action, "stats": stats}
+
+
+def rollback_failed_update(meta_file: str) -> bool:
+    """Restore a page whose update worker was killed mid-way (timeout, memory, crash). True if restored."""
+    hu = load_script('html-updater')
+    meta_path = str(Path(meta_file).resolve())
+    with contextlib.redirect_stdout(sys.stderr):
+        if not hu.rollback(meta_path):
+            return False
+        hu.update_metadata(meta_path, 'update_failed_rolled_back')
+    return True
+
+
+def apply_manifest(manifest_path: str, force: bool = False, workers: int = 1, timeout: float = 0,
+                   max_tasks: int = 0, max_rss_mb: float = 0, memory_limit_mb: float = 0) -> dict:
+    """
+    Incrementally (re-)apply every rewritten/updated page of a batch; up-to-date pages cost one hash each.
+    With workers > 1 (or any limit set) pages are applied in recyclable worker processes and
+    one that overruns its time/memory limit fails (and is rolled back) instead of stalling the run.
+    """
+    hu = load_script('html-updater')
+    manifest = _read_json(manifest_path)
+    counts = {}
+    names = {}
+    for entry in manifest.get('files', []):
+        meta_file = entry.get('meta_file')
+        if not meta_file or not Path(meta_file).exists() or entry.get('duplicate_of'):
+            # Identical copies are updated together with their canonical page
+            continue
+        names[meta_file] = entry.get('relative_path', meta_file)
+
+    def record(meta_file, action, stats):
+        if action == 'not_rewritten':
+            return
+        if action == 'failed':
+            print(f"  ✗ {names[meta_file]}: {stats}", file=sys.stderr)
+            if hu.rollback(meta_file):
+                hu.update_metadata(meta_file, 'update_failed_rolled_back')
+        elif action == 'modified_externally':
+            print(f"  ⚠️ {names[meta_file]}: edited since last update (use --force)", file=sys.stderr)
+        elif action in ('updated', 'unchanged'):
+            for path in stats['copies_skipped']:
+                print(f"  ⚠️ {path}: identical copy edited since, skipped (use --force)", file=sys.stderr)
+        counts[action] = counts.get(action, 0) + 1
+
+    if workers > 1 or timeout or max_tasks or max_rss_mb or memory_limit_mb:
+        hu.apply_pooled(list(names), record, workers, timeout, max_tasks, max_rss_mb, memory_limit_mb, force=force)
+        return counts
+    for meta_file in names:
+        try:
+            # Status check and apply share one load of the meta file
+            action, stats = hu.apply_rewritten(meta_file, force=force)
+        except Exception as e:
+            action, stats = 'failed', e
+        record(meta_file, action, stats)
+    return counts
+
+
+def op_rollback(req: dict) -> dict:
+    """Restore the original HTML from the backup recorded in the meta file."""
+    hu = load_script('html-updater')
+    meta_path = str(Path(req['meta_file']).resolve())
+    if not hu.rollback(meta_path):
+        raise FileNotFoundError("Backup not found (page or an identical copy)")
+    hu.update_metadata(meta_path, 'rolled_back')
+    return {"meta_file": meta_path, "status": "rolled_back"}
+
+
+def op_status(req: dict) -> dict:
+    """Status of a meta file or a batch manifest (json only, no bs4)."""
+    if req.get('manifest'):
+        manifest = _read_json(req['manifest'])
+        counts = {}
+        for f in manifest.get('files', []):
+            status = f.get('status', 'pending')
+            counts[status] = counts.get(status, 0) + 1
+        return {"status": manifest.get('status'), "total_files": manifest.get('total_files', 0), "files": counts}
+
+    if not req.get('meta_file'):
+        raise ValueError("status needs a meta_file or a manifest")
+    from nova_common import load_meta_header
+    header = load_meta_header(req['meta_file'])
+    return {
+        "status": header.get('status'),
+        "total_sections": header.get('total_sections', 0),
+        "rewritten_sections": header.get('rewritten_sections', 0),
+        "updated_at": header.get('updated_at')
+    }
+
+
+HANDLERS = {'parse': op_parse, 'update': op_update, 'rollback': op_rollback, 'status': op_status}
+
+
+def handle_request(req: dict) -> dict:
+    """Run one request; never raises. Script output goes to stderr to keep stdout pure JSON."""
+    response = {"id": req.get('id'), "op": req.get('op')}
+    try:
+        handler = HANDLERS.get(req.get('op'))
+        if not handler:
+            raise ValueError(f"Unknown op '{req.get('op')}' (choose: {', '.join(OPERATIONS)})")
+        with contextlib.redirect_stdout(sys.stderr):
+            response["result"] = handler(req)
+        response["ok"] = True
+    except SystemExit as e:
+        response.update(ok=False, error=f"exited with code {e.code}")
+    except Exception as e:
+        response.update(ok=False, error=f"{type(e).__name__}: {e}")
+    return response
+
+
+def serve(workers: int = 1, stdin=None, stdout=None, timeout: float = 0, max_tasks: int = 0,
+          max_rss_mb: float = 0, memory_limit_mb: float = 0):
+    """
+    Read one JSON request per line from stdin, write one JSON response per line.
+    With workers > 1 (or any limit set), parse/update/rollback run concurrently in
+    recyclable worker processes and responses are written as they finish (match
+    them by "id"); requests on the same page still run in the order sent.
+    A request may carry its own "timeout" in seconds.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    lock = threading.Lock()
+
+    def emit(response: dict):
+        with lock:
+            stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            stdout.flush()
+
+    def requests():
+        for line in stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                emit({"id": None, "ok": False, "error": f"Invalid JSON: {e}"})
+
+    if workers <= 1 and not (timeout or max_tasks or max_rss_mb or memory_limit_mb):
+        for req in requests():
+            emit(handle_request(req))
+        return
+
+    import multiprocessing
+    import queue
+    from nova_workers import OK, FileWorkerPool
+    tasks = queue.Queue()
+    pending = {}
+    busy = set()
+    idle = threading.Condition()
+
+    def read_requests():
+        for n, req in enumerate(requests()):
+            target = request_target(req)
+            with idle:
+                # A request waits for the one before it on the same page (parse → status/update)
+                idle.wait_for(lambda: target not in busy)
+                if req.get('op') != 'status' and target:
+                    busy.add(target)
+            # Status is cheap and read-only: answer in-process
+            if req.get('op') == 'status':
+                emit(handle_request(req))
+                continue
+            pending[n] = (req, target)
+            tasks.put((n, (req,), req.get('timeout') or timeout))
+        tasks.put(None)
+
+    def on_result(outcome):
+        req, target = pending.pop(outcome["key"])
+        if outcome["status"] == OK:
+            emit(outcome["result"])
+        else:
+            response = {"id": req.get('id'), "op": req.get('op'), "ok": False,
+                        "status": outcome["status"], "error": outcome["error"]}
+            if req.get('op') == 'update' and req.get('meta_file'):
+                # The worker was killed before it could roll back itself
+                try:
+                    response["rolled_back"] = rollback_failed_update(req['meta_file'])
+                except Exception as e:
+                    response["rolled_back"] = False
+                    print(f"ERROR: rollback of {req['meta_file']} failed: {e}", file=sys.stderr)
+            emit(response)
+        with idle:
+            busy.discard(target)
+            idle.notify_all()
+
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    with FileWorkerPool(handle_request, workers, max_tasks, max_rss_mb, memory_limit_mb, start_method) as pool:
+        threading.Thread(target=read_requests, daemon=True).start()
+        pool.run(tasks, on_result)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Nova unified entry point (parse/update/rollback/status/serve)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python nova.py parse page.html -o out/
+  python nova.py update out/page_meta.json
+  python nova.py apply out/batch_manifest.json       # re-apply a batch; unchanged pages are skipped
+  python nova.py status --manifest out/batch_manifest.json
+  python nova.py analytics out/batch_manifest.json
+  python nova.py duplicates out/batch_manifest.json
+  python nova.py evidence --db evidence.db --import verified.csv
+  python nova.py evidence out/batch_manifest.json --db evidence.db --report out/evidence.jsonl
+  python nova.py export out/batch_manifest.json -o deploy/site-v2
+
+  # JSON-lines server: one request per line on stdin, one response per line on stdout
+  python nova.py serve --workers 4
+  {"id": 1, "op": "parse", "html_file": "page.html", "output": "out/"}
+  {"id": 2, "op": "update", "meta_file": "out/page_meta.json"}
+  {"id": 3, "op": "rollback", "meta_file": "out/page_meta.json"}
+  {"id": 4, "op": "status", "meta_file": "out/page_meta.json"}
+        """
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_parse = sub.add_parser('parse', help='Parse HTML into sections')
+    p_parse.add_argument('html_file')
+    p_parse.add_argument('-o', '--output', help='Output directory (default: same as input)')
+    p_parse.add_argument('--parser', help='Parser engine (auto/html.parser/lxml/html5lib)')
+    p_parse.add_argument('--meta-format', help='Meta file format (json/compact/compact-gz)')
+    p_parse.add_argument('--boilerplate', help='Learned boilerplate rules file (boilerplate.json)')
+
+    p_update = sub.add_parser('update', help='Apply rewritten content to HTML (skips pages already up to date)')
+    p_update.add_argument('meta_file')
+    p_update.add_argument('--force', action='store_true', help='Re-apply even if up to date or edited since')
+
+    p_apply = sub.add_parser('apply', help='Incrementally apply every rewritten/updated page in a manifest')
+    p_apply.add_argument('manifest')
+    p_apply.add_argument('--force', action='store_true', help='Re-apply even if up to date or edited since')
+    p_apply.add_argument('--workers', type=int, default=1, help='Apply in N isolated worker processes (default: 1)')
+    p_apply.add_argument('--timeout', type=float, default=0,
+                         help='Per-page wall-clock limit in seconds; overruns fail and are rolled back')
+    p_apply.add_argument('--max-tasks', type=int, default=0, help='Restart a worker after N pages')
+    p_apply.add_argument('--max-rss', type=float, default=0, help='Restart a worker once its RSS passes N MB')
+    p_apply.add_argument('--memory-limit', type=float, default=0, help='Per-worker address-space limit in MB')
+
+    p_rollback = sub.add_parser('rollback', help='Restore original HTML from backup')
+    p_rollback.add_argument('meta_file')
+
+    p_status = sub.add_parser('status', help='Show meta file or manifest status')
+    p_status.add_argument('meta_file', nargs='?')
+    p_status.add_argument('--manifest', help='Batch manifest path')
+
+    p_analytics = sub.add_parser('analytics', help='Length and format compliance report for a manifest (numpy)')
+    p_analytics.add_argument('manifest')
+    p_analytics.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    p_analytics.add_argument('--examples', type=int, default=5, help='Violations listed per kind (default: 5)')
+    p_analytics.add_argument('--format', dest='default_format', help='Budget for sections without an output_format '
+                                                                     '(MICRO_EXP/EXP-LITE/EXP)')
+
+    p_dupes = sub.add_parser('duplicates', help='Exact and near-duplicate titles, descriptions, H1/H2 across a manifest')
+    p_dupes.add_argument('manifest')
+    p_dupes.add_argument('--fields', help='Comma-separated subset of title,description,h1,h2 (default: all)')
+    p_dupes.add_argument('--threshold', type=float, help='Near-duplicate Jaccard threshold (default: 0.6)')
+    p_dupes.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    p_dupes.add_argument('--examples', type=int, default=5, help='Groups listed per field (default: 5)')
+
+    p_evidence = sub.add_parser('evidence', help='Check numeric claims (RTP, odds, bonus, amounts) against the evidence registry')
+    p_evidence.add_argument('manifest', nargs='?')
+    p_evidence.add_argument('--db', help='Evidence registry (SQLite; default: $NOVA_EVIDENCE_DB)')
+    p_evidence.add_argument('--import', dest='import_csv', metavar='CSV',
+                            help='Load entity,kind,value,unit,source[,verified_at] rows into the registry')
+    p_evidence.add_argument('--report', help='Write the per-page report as JSON lines')
+    p_evidence.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    p_evidence.add_argument('--examples', type=int, default=5, help='Flagged pages listed (default: 5)')
+
+    p_export = sub.add_parser('export', help='Bundle only changed pages of an updated batch (+ rollback bundle)')
+    p_export.add_argument('manifest')
+    p_export.add_argument('-o', '--output', help='Bundle path without suffix (default: <manifest dir>/bundle-<timestamp>)')
+    p_export.add_argument('--compression', default='auto', help='zst (needs zstandard), gz, auto (default)')
+
+    p_serve = sub.add_parser('serve', help='Serve JSON-lines requests on stdin/stdout')
+    p_serve.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                         help='Worker processes for concurrent requests (1 = in-process)')
+    p_serve.add_argument('--timeout', type=float, default=0,
+                         help='Per-request wall-clock limit in seconds; the worker is killed and replaced')
+    p_serve.add_argument('--max-tasks', type=int, default=0, help='Restart a worker after N requests')
+    p_serve.add_argument('--max-rss', type=float, default=0, help='Restart a worker once its RSS passes N MB')
+    p_serve.add_argument('--memory-limit', type=float, default=0, help='Per-worker address-space limit in MB')
+
+    args = parser.parse_args()
+    if args.command == 'status' and not (args.meta_file or args.manifest):
+        p_status.error('give a meta file or --manifest')
+
+    if args.command == 'serve':
+        serve(args.workers, timeout=args.timeout, max_tasks=args.max_tasks, max_rss_mb=args.max_rss,
+              memory_limit_mb=args.memory_limit)
+        return
+
+    if args.command == 'analytics':
+        from nova_analytics import compute_report, load_columns, print_report
+        try:
+            report = compute_report(load_columns(args.manifest), max_listed=args.examples,
+                                    default_format=args.default_format)
+        except (RuntimeError, ValueError) as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print_report(report, args.examples)
+        return
+
+    if args.command == 'apply':
+        import time
+        started = time.perf_counter()
+        counts = apply_manifest(args.manifest, args.force, args.workers, args.timeout, args.max_tasks,
+                                args.max_rss, args.memory_limit)
+        print(json.dumps({"counts": counts, "seconds": round(time.perf_counter() - started, 2)}, indent=2))
+        if counts.get('failed') or counts.get('modified_externally'):
+            sys.exit(1)
+        return
+
+    if args.command == 'duplicates':
+        from nova_duplicates import NEAR_THRESHOLD, duplicate_report, print_duplicates
+        fields = args.fields.split(',') if args.fields else None
+        report = duplicate_report(args.manifest, fields, args.threshold or NEAR_THRESHOLD)
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print_duplicates(report, args.examples)
+        return
+
+    if args.command == 'evidence':
+        from nova_evidence import evidence_report, import_csv, open_registry, print_evidence_report, resolve_db
+        try:
+            db_path = resolve_db(args.db)
+            if args.import_csv:
+                conn = open_registry(db_path)
+                print(f"📥 {import_csv(conn, args.import_csv)} rows → {db_path}")
+                conn.close()
+            if args.manifest:
+                report = evidence_report(args.manifest, db_path, args.report)
+                if args.json:
+                    print(json.dumps(report, ensure_ascii=False, indent=2))
+                else:
+                    print_evidence_report(report, args.examples)
+                if report["grades"]["red"]:
+                    sys.exit(1)
+        except (ValueError, KeyError) as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        return
+
+    if args.command == 'export':
+        from nova_bundle import export_bundle, print_bundle_result
+        try:
+            print_bundle_result(export_bundle(args.manifest, args.output, args.compression))
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        return
+
+    req = {k: v for k, v in vars(args).items() if v is not None and k != 'command'}
+    req['op'] = args.command
+    response = handle_request(req)
+    print(json.dumps(response, ensure_ascii=False, indent=2))
+    if not response['ok']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Corpus analytics for a batch manifest
+Loads every section into NumPy columns and checks the SKILL.md output budgets
+(MICRO_EXP / EXP-LITE / EXP word ranges, title and description lengths) in bulk.
+A section's budget is its declared `output_format` (set per page or per section by
+`html-rewriter.py --save`), else the report's default format (`--format`), else it
+only has to fit some band.
+Per-page section columns are cached in analytics_columns.npz next to the manifest,
+keyed on each meta file's mtime and size (like duplicate_index.json), so a re-run
+only re-reads meta files that changed; those are read in bulk (compact sections in
+one JSON parse, no class expansion). compute_report() is vectorised. Used by
+`nova.py analytics` and `batch-processor.py --status ... --analytics`.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from nova_common import load_meta_file
+
+# Output budgets from SKILL.md (words, inclusive); MICRO_EXP is "<60w"
+FORMAT_BUDGETS = {
+    'MICRO_EXP': (1, 59),
+    'EXP-LITE': (120, 150),
+    'EXP': (300, 400),
+}
+FORMAT_CODES = {name: code for code, name in enumerate(FORMAT_BUDGETS)}
+TITLE_MAX_CHARS = 60
+DESCRIPTION_RANGE = (150, 160)
+
+# Histogram bin edges for rewritten sections (lower bounds)
+WORD_BINS = [1, 60, 120, 151, 300, 401]
+WORD_BIN_LABELS = ['1-59', '60-119', '120-150', '151-299', '300-400', '>400']
+PERCENTILES = [5, 25, 50, 75, 95]
+
+COLUMNS_FILE_NAME = "analytics_columns.npz"
+COLUMNS_VERSION = 1
+# Per-section row: index, original words, original chars, rewritten words, rewritten chars, format code
+_ROW_WIDTH = 6
+_SPACE_TABLE = None
+
+
+def _np():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("numpy required for analytics. Install: pip install numpy")
+    return numpy
+
+
+def _space_table(np):
+    """Code point -> is whitespace, as str.split() sees it."""
+    global _SPACE_TABLE
+    if _SPACE_TABLE is None:
+        _SPACE_TABLE = np.zeros(0x110000, dtype=bool)
+        _SPACE_TABLE[[c for c in range(0x3001) if chr(c).isspace()]] = True
+    return _SPACE_TABLE
+
+
+def _word_counts(np, texts: list) -> tuple:
+    """(words, chars) per text, words counted as len(text.split()) in one pass over all code points."""
+    chars = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    if not texts:
+        return chars, chars
+    joined = ' '.join(texts).encode('utf-32-le', 'surrogatepass')
+    space = _space_table(np)[np.frombuffer(joined, dtype=np.uint32)]
+    starts = ~space
+    starts[1:] &= space[:-1]
+    starts = np.flatnonzero(starts)
+    offsets = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum(chars[:-1] + 1, out=offsets[1:])
+    return np.searchsorted(starts, offsets + chars) - np.searchsorted(starts, offsets), chars
+
+
+def _page_columns(np, meta_file: str) -> tuple:
+    """(title chars, description chars, rows) of one meta file; rows is an (n, 6) int32 array."""
+    metadata = load_meta_file(meta_file, expand_classes=False)
+    page_format = FORMAT_CODES.get(metadata.get('output_format'), -1)
+    sections = metadata.get('sections', [])
+    texts, owner = [], []
+    for n, section in enumerate(sections):
+        paragraphs = section.get('paragraphs', [])
+        texts.extend(p.get('text', '') for p in paragraphs)
+        owner.extend([n] * len(paragraphs))
+    words, chars = _word_counts(np, texts + [s.get('rewritten_content') or '' for s in sections])
+    owner = np.asarray(owner, dtype=np.int64)
+    split = len(texts)
+
+    rows = np.empty((len(sections), _ROW_WIDTH), dtype=np.int32)
+    rows[:, 0] = [s.get('index', 0) for s in sections]
+    rows[:, 1] = np.bincount(owner, weights=words[:split], minlength=len(sections))
+    # Original text = the section's paragraphs joined with single spaces
+    rows[:, 2] = (np.bincount(owner, weights=chars[:split], minlength=len(sections))
+                  + np.maximum(np.bincount(owner, minlength=len(sections)) - 1, 0))
+    rows[:, 3] = words[split:]
+    rows[:, 4] = chars[split:]
+    rows[:, 5] = [FORMAT_CODES.get(s.get('output_format'), page_format) for s in sections]
+    # -1 = no rewritten title/description yet
+    title = metadata.get('rewritten_title')
+    desc = metadata.get('rewritten_description')
+    return len(title) if title else -1, len(desc) if desc else -1, rows
+
+
+def _load_cache(np, cache_path: Path) -> dict:
+    """meta_file -> (mtime_ns, size, title chars, description chars, rows) from the column cache."""
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            if int(data["version"]) != COLUMNS_VERSION:
+                return {}
+            metas, stats, pages, counts, rows = (data[k] for k in ("meta_files", "stats", "pages", "counts", "rows"))
+    except (OSError, KeyError, ValueError):
+        return {}
+    ends = np.cumsum(counts)
+    return {str(meta): (int(stat[0]), int(stat[1]), int(page[0]), int(page[1]), rows[end - n:end])
+            for meta, stat, page, n, end in zip(metas, stats, pages, counts, ends)}
+
+
+def _save_cache(np, cache_path: Path, cached: dict):
+    metas = sorted(cached)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, version=COLUMNS_VERSION, meta_files=np.asarray(metas, dtype=str),
+                 stats=np.asarray([cached[m][:2] for m in metas], dtype=np.int64).reshape(-1, 2),
+                 pages=np.asarray([cached[m][2:4] for m in metas], dtype=np.int32).reshape(-1, 2),
+                 counts=np.asarray([len(cached[m][4]) for m in metas], dtype=np.int64),
+                 rows=np.concatenate([cached[m][4] for m in metas] or [np.empty((0, _ROW_WIDTH), np.int32)]))
+    os.replace(tmp_path, cache_path)
+
+
+def load_columns(manifest_path: str, use_cache: bool = True) -> dict:
+    """
+    Read every meta file in the manifest into columnar NumPy arrays (one page per
+    canonical entry; identical copies are not counted again).
+    Unchanged meta files (same mtime and size) come from the column cache;
+    "cache" in the result counts reused vs re-read meta files.
+    """
+    np = _np()
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    cache_path = Path(manifest_path).resolve().parent / COLUMNS_FILE_NAME
+    cached = _load_cache(np, cache_path) if use_cache else {}
+
+    files, pages, current = [], [], {}
+    counts = {"reused": 0, "refreshed": 0}
+    for entry in manifest.get('files', []):
+        meta_file = entry.get('meta_file')
+        if not meta_file or not Path(meta_file).exists() or entry.get('duplicate_of'):
+            # Identical copies share their canonical page's meta file: count it once
+            continue
+        st = os.stat(meta_file)
+        page = cached.get(meta_file)
+        if page and page[:2] == (st.st_mtime_ns, st.st_size):
+            counts["reused"] += 1
+        else:
+            page = (st.st_mtime_ns, st.st_size) + _page_columns(np, meta_file)
+            counts["refreshed"] += 1
+        current[meta_file] = page
+        files.append(entry.get('relative_path', meta_file))
+        pages.append(page)
+    if use_cache and (counts["refreshed"] or len(current) != len(cached)):
+        _save_cache(np, cache_path, current)
+
+    rows = np.concatenate([p[4] for p in pages] or [np.empty((0, _ROW_WIDTH), np.int32)])
+    return {
+        "files": files,
+        "section_file": np.repeat(np.arange(len(pages), dtype=np.int32), [len(p[4]) for p in pages]),
+        "section_index": rows[:, 0],
+        "orig_words": rows[:, 1],
+        "orig_chars": rows[:, 2],
+        "new_words": rows[:, 3],
+        "new_chars": rows[:, 4],
+        "format": rows[:, 5].astype(np.int8),
+        "title_chars": np.asarray([p[2] for p in pages], dtype=np.int32),
+        "desc_chars": np.asarray([p[3] for p in pages], dtype=np.int32),
+        "cache": counts,
+    }
+
+
+def _percentiles(np, values) -> dict:
+    if values.size == 0:
+        return {}
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def compute_report(cols: dict, max_listed: int = 20, default_format: str = None) -> dict:
+    """Distributions and violation lists, all computed with array masks."""
+    np = _np()
+    if default_format:
+        if default_format not in FORMAT_CODES:
+            raise ValueError(f"Unknown format '{default_format}' (choose: {', '.join(FORMAT_BUDGETS)})")
+        cols = dict(cols, format=np.where(cols["format"] < 0, FORMAT_CODES[default_format], cols["format"]))
+    rewritten = cols["new_words"] > 0
+    new_words = cols["new_words"][rewritten]
+    ratio_mask = rewritten & (cols["orig_chars"] > 0)
+    ratio = cols["new_chars"][ratio_mask] / cols["orig_chars"][ratio_mask]
+
+    # Sections with a declared format that misses its budget; undeclared ones must fit some band
+    off_budget = np.zeros(cols["new_words"].shape, dtype=bool)
+    in_any_band = np.zeros(cols["new_words"].shape, dtype=bool)
+    bands = {}
+    for name, (low, high) in FORMAT_BUDGETS.items():
+        in_band = (cols["new_words"] >= low) & (cols["new_words"] <= high)
+        in_any_band |= in_band
+        declared = cols["format"] == FORMAT_CODES[name]
+        off_budget |= rewritten & declared & ~in_band
+        bands[name] = int(np.count_nonzero(rewritten & in_band))
+    no_band = rewritten & (cols["format"] < 0) & ~in_any_band
+
+    titled = cols["title_chars"] >= 0
+    described = cols["desc_chars"] >= 0
+    long_titles = np.flatnonzero(titled & (cols["title_chars"] > TITLE_MAX_CHARS))
+    low, high = DESCRIPTION_RANGE
+    bad_descs = np.flatnonzero(described & ((cols["desc_chars"] < low) | (cols["desc_chars"] > high)))
+
+    def list_sections(mask):
+        idx = np.flatnonzero(mask)[:max_listed]
+        return [{"file": cols["files"][cols["section_file"][i]], "section": int(cols["section_index"][i]),
+                 "words": int(cols["new_words"][i])} for i in idx]
+
+    def list_pages(idx, column):
+        return [{"file": cols["files"][i], "chars": int(cols[column][i])} for i in idx[:max_listed]]
+
+    hist, _ = np.histogram(new_words, bins=WORD_BINS + [np.iinfo(np.int32).max])
+    return {
+        "pages": len(cols["files"]),
+        "sections": int(cols["new_words"].size),
+        "rewritten_sections": int(new_words.size),
+        "original_words": _percentiles(np, cols["orig_words"]),
+        "rewritten_words": _percentiles(np, new_words),
+        "length_ratio": _percentiles(np, ratio),
+        "rewritten_words_histogram": dict(zip(WORD_BIN_LABELS, (int(h) for h in hist))),
+        "format_bands": bands,
+        "violations": {
+            "declared_format_out_of_budget": int(np.count_nonzero(off_budget)),
+            "outside_all_formats": int(np.count_nonzero(no_band)),
+            "title_too_long": int(long_titles.size),
+            "description_out_of_range": int(bad_descs.size),
+        },
+        "examples": {
+            "declared_format_out_of_budget": list_sections(off_budget),
+            "outside_all_formats": list_sections(no_band),
+            "title_too_long": list_pages(long_titles, "title_chars"),
+            "description_out_of_range": list_pages(bad_descs, "desc_chars"),
+        },
+    }
+
+
+def print_report(report: dict, examples: int = 5):
+    """Print the analytics report in the --status style."""
+    print(f"\n📈 Analytics: {report['pages']} pages, {report['sections']} sections, "
+          f"{report['rewritten_sections']} rewritten")
+
+    def pct_line(label, pct, fmt="{:.0f}"):
+        if pct:
+            print(f"   {label:18} " + "  ".join(f"{k}={fmt.format(v)}" for k, v in pct.items()))
+
+    pct_line("Original words", report["original_words"])
+    pct_line("Rewritten words", report["rewritten_words"])
+    pct_line("Length ratio", report["length_ratio"], "{:.2f}")
+
+    hist = report["rewritten_words_histogram"]
+    if report["rewritten_sections"]:
+        peak = max(hist.values()) or 1
+        print("\n   Rewritten words per section:")
+        for label, count in hist.items():
+            print(f"   {label:>8} │{'█' * round(30 * count / peak):30} {count}")
+
+    print("\n   Format bands: " + ", ".join(f"{k} {v}" for k, v in report["format_bands"].items()))
+    v = report["violations"]
+    print(f"   ⚠️  Off declared budget: {v['declared_format_out_of_budget']}")
+    print(f"   ⚠️  Outside all formats: {v['outside_all_formats']}")
+    print(f"   ⚠️  Title > {TITLE_MAX_CHARS} chars: {v['title_too_long']}")
+    print(f"   ⚠️  Description not {DESCRIPTION_RANGE[0]}-{DESCRIPTION_RANGE[1]} chars: "
+          f"{v['description_out_of_range']}")
+
+    for kind, items in report["examples"].items():
+        for item in items[:examples]:
+            where = f"[{item['section']}] " if 'section' in item else ""
+            size = f"{item['words']}w" if 'words' in item else f"{item['chars']} chars"
+            print(f"      - {kind}: {item['file']} {where}({size})")
@@ -0,0 +1,215 @@
+"""
+Corpus-learned boilerplate detection
+Besides the fixed template tags (script, nav, footer, aside, header…), site
+templates repeat div-based promo bars, sidebars and "related posts" blocks on
+every page. A corpus pass over a sample of pages learns two kinds of rules:
+  - text:     a subtree whose tag + normalized text recurs on > threshold of pages
+  - selector: a tag#id / tag.class block on > threshold of pages that is mostly
+              links and whose text is itself a text rule wherever it was seen
+              (menus, promo bars: still caught on pages outside the sample)
+A block holding a paragraph that is not learned boilerplate is never stripped,
+so a link-heavy content wrapper survives. Rules are cached per site in
+<output>/boilerplate.json, reused while the threshold and the sampled pages'
+contents are unchanged, and applied before the main content area is chosen,
+so those blocks never become sections.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from nova_common import file_hash, make_soup, read_html
+
+FIXED_BOILERPLATE_TAGS = ['script', 'style', 'nav', 'footer', 'aside', 'noscript', 'iframe', 'header']
+RULES_FILE_NAME = "boilerplate.json"
+RULES_VERSION = 1
+
+DEFAULT_THRESHOLD = 0.5     # share of sampled pages a subtree must appear on
+DEFAULT_SAMPLE = 200        # pages read by the corpus pass (evenly spaced)
+MIN_PAGES = 3               # below this a "repeat" means nothing
+LINK_DENSITY_MIN = 0.5      # selector rules only for link-dominated blocks
+MIN_TEXT_CHARS = 10         # same cut-off as section extraction
+
+# Subtrees considered for rules; headings/paragraphs catch repeated disclaimers and "Related posts" titles
+CANDIDATE_TAGS = ['div', 'section', 'ul', 'ol', 'table', 'form', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+PROTECTED_TAGS = ['body', 'main', 'article']
+
+
+def strip_fixed_tags(soup):
+    for tag in soup(FIXED_BOILERPLATE_TAGS):
+        tag.decompose()
+
+
+def _normalized_text(element) -> str:
+    return ' '.join(element.get_text(' ', strip=True).split()).casefold()
+
+
+def _text_key(tag_name: str, text: str) -> str:
+    return f"{tag_name}:{hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()}"
+
+
+def _selector(element) -> str:
+    """tag#id or tag.class1.class2 (None for bare tags)."""
+    if element.get('id'):
+        return f"{element.name}#{element['id']}"
+    classes = element.get('class') or []
+    return f"{element.name}.{'.'.join(sorted(classes))}" if classes else None
+
+
+def _link_density(element, text_len: int) -> float:
+    link_chars = sum(len(a.get_text(' ', strip=True)) for a in element.find_all('a'))
+    return min(1.0, link_chars / text_len) if text_len else 0.0
+
+
+def _holds_content(element, text_rules: dict) -> bool:
+    """True if element contains a paragraph that isn't learned boilerplate (page content)."""
+    for paragraph in element.find_all('p'):
+        text = _normalized_text(paragraph)
+        if len(text) >= MIN_TEXT_CHARS and _text_key('p', text) not in text_rules:
+            return True
+    return False
+
+
+def iter_candidates(root):
+    """(element, text_key, selector, text) for each candidate subtree, in document order."""
+    for element in root.find_all(CANDIDATE_TAGS):
+        if getattr(element, 'decomposed', False):
+            continue
+        text = _normalized_text(element)
+        if len(text) < MIN_TEXT_CHARS:
+            continue
+        yield element, _text_key(element.name, text), _selector(element), text
+
+
+def sample_files(files: list, sample: int = DEFAULT_SAMPLE) -> list:
+    """Evenly spaced sample so every part of the site is represented."""
+    files = sorted(files)
+    if sample <= 0 or len(files) <= sample:
+        return files
+    step = len(files) / sample
+    return [files[int(i * step)] for i in range(sample)]
+
+
+def learn_boilerplate(html_files: list, parser: str = 'html.parser', threshold: float = DEFAULT_THRESHOLD,
+                      sample: int = DEFAULT_SAMPLE) -> dict:
+    """Corpus pass: count per-page occurrences of subtree hashes and selectors."""
+    pages = sample_files([str(f) for f in html_files], sample)
+    text_pages, text_examples = {}, {}
+    selector_pages, selector_density, selector_texts = {}, {}, {}
+    read = 0
+
+    for path in pages:
+        try:
+            markup, _ = read_html(path)
+        except OSError:
+            continue
+        soup = make_soup(markup, parser)
+        strip_fixed_tags(soup)
+        body = soup.find('body')
+        if not body:
+            continue
+        read += 1
+
+        seen_text, seen_selectors = set(), {}
+        for element, key, selector, text in iter_candidates(body):
+            if key not in seen_text:
+                seen_text.add(key)
+                text_examples.setdefault(key, text[:80])
+            if selector and element.name not in PROTECTED_TAGS and not element.find(PROTECTED_TAGS):
+                density = _link_density(element, len(text))
+                seen_selectors[selector] = max(density, seen_selectors.get(selector, 0.0))
+                selector_texts.setdefault(selector, set()).add(key)
+        for key in seen_text:
+            text_pages[key] = text_pages.get(key, 0) + 1
+        for selector, density in seen_selectors.items():
+            selector_pages[selector] = selector_pages.get(selector, 0) + 1
+            selector_density[selector] = selector_density.get(selector, 0.0) + density
+
+    min_pages = max(MIN_PAGES, int(threshold * read) + 1)
+    text_rules = {key: {"pages": round(n / read, 3), "sample": text_examples[key]}
+                  for key, n in text_pages.items() if n >= min_pages}
+    selector_rules = {}
+    for selector, n in selector_pages.items():
+        density = selector_density[selector] / n
+        # Structure alone isn't enough: every matched block's text must recur across pages too
+        if n >= min_pages and density >= LINK_DENSITY_MIN and selector_texts[selector] <= text_rules.keys():
+            selector_rules[selector] = {"pages": round(n / read, 3), "link_density": round(density, 3)}
+
+    return {
+        "version": RULES_VERSION,
+        "parser": parser,
+        "threshold": threshold,
+        "pages_sampled": read,
+        "learned_at": datetime.now().isoformat(),
+        "text": text_rules,
+        "selector": selector_rules,
+    }
+
+
+def strip_boilerplate(root, rules: dict) -> int:
+    """Remove learned boilerplate subtrees from root; returns how many were removed."""
+    if not rules or not (rules.get("text") or rules.get("selector")):
+        return 0
+    text_rules = rules.get("text", {})
+    selector_rules = rules.get("selector", {})
+    removed = 0
+    for element, key, selector, _ in list(iter_candidates(root)):
+        if getattr(element, 'decomposed', False) or element.name in PROTECTED_TAGS:
+            continue
+        if key in text_rules or (selector in selector_rules and not element.find(PROTECTED_TAGS)):
+            if _holds_content(element, text_rules):
+                continue
+            element.decompose()
+            removed += 1
+    return removed
+
+
+def rules_path(output_dir) -> Path:
+    return Path(output_dir) / RULES_FILE_NAME
+
+
+def load_rules(path) -> dict:
+    """Learned rules from a boilerplate.json (None if missing or unreadable)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return rules if rules.get("version") == RULES_VERSION else None
+
+
+def save_rules(path, rules: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(rules, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def corpus_digest(html_files: list, sample: int = DEFAULT_SAMPLE) -> str:
+    """SHA-256 over the content hashes of the pages the corpus pass samples."""
+    digest = hashlib.sha256()
+    for path in sample_files([str(f) for f in html_files], sample):
+        try:
+            digest.update(file_hash(path).encode('ascii'))
+        except OSError:
+            digest.update(b'missing')
+    return digest.hexdigest()
+
+
+def learn_or_load(output_dir, html_files: list, parser: str = 'html.parser', threshold: float = DEFAULT_THRESHOLD,
+                  sample: int = DEFAULT_SAMPLE, relearn: bool = False) -> tuple:
+    """
+    Cached rules for this site if they were learned with the same threshold from the same
+    page contents, else learn and cache. Returns (rules, path, cached).
+    """
+    path = rules_path(output_dir)
+    corpus = corpus_digest(html_files, sample)
+    rules = None if relearn else load_rules(path)
+    if rules and rules.get("threshold") == threshold and rules.get("corpus") == corpus:
+        return rules, path, True
+    rules = learn_boilerplate(html_files, parser, threshold, sample)
+    rules["corpus"] = corpus
+    save_rules(path, rules)
+    return rules, path, False
@@ -0,0 +1,144 @@
+"""
+Changed-only deployment bundles
+After a batch is updated, only pages whose bytes differ from their backup need
+shipping. export_bundle() hashes each updated page against its backup and writes
+  <name>.tar.zst|.tar.gz           changed pages at their site-relative paths
+  <name>-rollback.tar.zst|.tar.gz  the backed-up originals at the same paths
+Each archive starts with BUNDLE_MANIFEST_NAME listing path, size and SHA-256 of
+every file (and the hash it replaces), so deploy I/O scales with the change.
+"""
+
+import io
+import json
+import tarfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from nova_common import file_hash, load_meta_header
+from nova_dedupe import copy_backups
+
+BUNDLE_MANIFEST_NAME = "nova-bundle.json"
+COMPRESSIONS = ['auto', 'zst', 'gz']
+_SUFFIXES = {'zst': '.tar.zst', 'gz': '.tar.gz'}
+
+
+def zstd_available() -> bool:
+    try:
+        __import__('zstandard')
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_compression(requested: str = 'auto') -> str:
+    if requested in (None, 'auto'):
+        return 'zst' if zstd_available() else 'gz'
+    if requested not in _SUFFIXES:
+        raise ValueError(f"Unknown compression '{requested}' (choose: {', '.join(COMPRESSIONS)})")
+    if requested == 'zst' and not zstd_available():
+        raise ValueError("zstandard required for .tar.zst bundles. Install: pip install zstandard")
+    return requested
+
+
+def changed_pages(manifest: dict) -> tuple:
+    """
+    (changed, unchanged, skipped) for pages whose meta status is 'updated'; changed carries both hashes.
+    Identical copies share their canonical's meta file but are compared with their own backup.
+    """
+    source_root = Path(manifest["source_folder"])
+    changed, unchanged, skipped = [], 0, []
+    for entry in manifest.get("files", []):
+        meta_file = entry.get("meta_file")
+        if not meta_file or not Path(meta_file).exists():
+            continue
+        header = load_meta_header(meta_file)
+        if header.get("status") != "updated":
+            continue
+        source = Path(entry["source"])
+        backup = copy_backups(header).get(str(source), header.get("backup_path"))
+        if not source.exists() or not backup or not Path(backup).exists():
+            skipped.append(entry.get("relative_path", str(source)))
+            continue
+        new_hash, old_hash = file_hash(source), file_hash(backup)
+        if new_hash == old_hash:
+            unchanged += 1
+            continue
+        changed.append({
+            "path": source.relative_to(source_root).as_posix(),
+            "source": str(source),
+            "backup": backup,
+            "sha256": new_hash,
+            "previous_sha256": old_hash,
+        })
+    return changed, unchanged, skipped
+
+
+def _open_tar(path: Path, compression: str):
+    """Tar writer plus the raw file to close after it (zstd streams through zstandard)."""
+    if compression == 'gz':
+        return tarfile.open(path, 'w:gz'), None
+    import zstandard
+    raw = open(path, 'wb')
+    stream = zstandard.ZstdCompressor(level=10).stream_writer(raw)
+    return tarfile.open(fileobj=stream, mode='w|'), stream
+
+
+def _write_bundle(path: Path, pages: list, file_key: str, hash_key: str, replaces_key: str,
+                  compression: str, info: dict):
+    listing = dict(info, files=[{"path": p["path"], "size": Path(p[file_key]).stat().st_size,
+                                 "sha256": p[hash_key], "replaces_sha256": p[replaces_key]} for p in pages])
+    data = json.dumps(listing, ensure_ascii=False, indent=2).encode('utf-8')
+
+    tar, stream = _open_tar(path, compression)
+    try:
+        member = tarfile.TarInfo(BUNDLE_MANIFEST_NAME)
+        member.size = len(data)
+        member.mtime = int(time.time())
+        tar.addfile(member, io.BytesIO(data))
+        for page in pages:
+            tar.add(page[file_key], arcname=page["path"], recursive=False)
+    finally:
+        tar.close()
+        if stream:
+            stream.close()
+
+
+def export_bundle(manifest_path: str, output: str = None, compression: str = 'auto') -> dict:
+    """Write the changed-only bundle and its reverse bundle; returns paths and counts."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    compression = resolve_compression(compression)
+    changed, unchanged, skipped = changed_pages(manifest)
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = Path(output) if output else Path(manifest_path).resolve().parent / f"bundle-{stamp}"
+    base.parent.mkdir(parents=True, exist_ok=True)
+    suffix = _SUFFIXES[compression]
+    bundle_path = base.with_name(base.name + suffix)
+    rollback_path = base.with_name(base.name + "-rollback" + suffix)
+
+    result = {"bundle": None, "rollback": None, "changed": len(changed), "unchanged": unchanged,
+              "skipped": skipped, "bytes": sum(Path(p["source"]).stat().st_size for p in changed)}
+    if not changed:
+        return result
+
+    info = {"source_folder": manifest["source_folder"], "created_at": datetime.now().isoformat()}
+    _write_bundle(bundle_path, changed, "source", "sha256", "previous_sha256", compression,
+                  dict(info, kind="deploy"))
+    _write_bundle(rollback_path, changed, "backup", "previous_sha256", "sha256", compression,
+                  dict(info, kind="rollback"))
+    result.update(bundle=str(bundle_path), rollback=str(rollback_path))
+    return result
+
+
+def print_bundle_result(result: dict):
+    print(f"\n📦 Changed pages: {result['changed']} ({result['bytes'] / 1024:.1f} KB), "
+          f"unchanged: {result['unchanged']}")
+    for path in result["skipped"]:
+        print(f"   ⚠️  No backup or source, skipped: {path}")
+    if result["bundle"]:
+        print(f"   Deploy:   {result['bundle']}")
+        print(f"   Rollback: {result['rollback']}")
+    else:
+        print("   Nothing to ship.")
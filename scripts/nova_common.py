@@ -0,0 +1,464 @@
+"""
+Shared helpers for the Nova HTML scripts (html-parser, batch-processor, html-updater).
+Kept import-light: bs4 is only touched when a soup is actually built.
+"""
+
+import codecs
+import gzip
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+# Parser engines accepted by BeautifulSoup, fastest first for 'auto'
+PARSER_ENGINES = ['lxml', 'html.parser', 'html5lib']
+DEFAULT_PARSER = 'html.parser'
+
+# Config setting: NOVA_HTML_PARSER=auto|html.parser|lxml|html5lib
+PARSER_ENV_VAR = 'NOVA_HTML_PARSER'
+
+_STRUCTURE_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p']
+_NOISE_RE = re.compile(r'<!--.*?-->|<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_STRUCTURE_TAG_RE = re.compile(r'<(?:h[1-6]|p)(?=[\s/>])', re.IGNORECASE)
+
+
+def parser_available(engine: str) -> bool:
+    """Check whether a parser engine can be used in this environment."""
+    if engine == 'html.parser':
+        return True
+    module = {'lxml': 'lxml', 'html5lib': 'html5lib'}.get(engine)
+    if not module:
+        return False
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_parser(requested: str = None) -> str:
+    """Resolve requested engine (or NOVA_HTML_PARSER, or 'auto') to a usable one."""
+    requested = requested or os.environ.get(PARSER_ENV_VAR) or 'auto'
+    if requested == 'auto':
+        return 'lxml' if parser_available('lxml') else DEFAULT_PARSER
+    if requested not in PARSER_ENGINES:
+        raise ValueError(f"Unknown parser '{requested}' (choose: auto, {', '.join(PARSER_ENGINES)})")
+    if not parser_available(requested):
+        raise ValueError(f"Parser '{requested}' is not installed. Install: pip install {requested}")
+    return requested
+
+
+def make_soup(markup: str, engine: str = DEFAULT_PARSER):
+    """Build a BeautifulSoup tree with the given engine."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(markup, engine or DEFAULT_PARSER)
+
+
+def count_structure_tags(markup: str) -> int:
+    """Cheap regex count of heading/paragraph start tags outside comments and scripts."""
+    return len(_STRUCTURE_TAG_RE.findall(_NOISE_RE.sub('', markup)))
+
+
+def parse_with_fallback(markup: str, engine: str):
+    """
+    Parse markup with engine; fall back to html.parser when a faster engine
+    changed the heading/paragraph structure (tag count differs from the source).
+    Returns (soup, engine_used).
+    """
+    soup = make_soup(markup, engine)
+    if engine == DEFAULT_PARSER:
+        return soup, engine
+
+    if len(soup.find_all(_STRUCTURE_TAGS)) != count_structure_tags(markup):
+        return make_soup(markup, DEFAULT_PARSER), DEFAULT_PARSER
+    return soup, engine
+
+
+# --- Charset sniffing / transcoding -------------------------------------------
+SNIFF_BYTES = 4096
+LEGACY_ENCODING = 'windows-1258'  # older Vietnamese exports
+_BOMS = [(codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')]
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+
+
+def _canonical_encoding(name: str):
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_encoding(raw: bytes) -> str:
+    """BOM, then <meta charset> in the first SNIFF_BYTES, then UTF-8 validity, else windows-1258."""
+    for bom, encoding in _BOMS:
+        if raw.startswith(bom):
+            return encoding
+
+    match = _META_CHARSET_RE.search(raw[:SNIFF_BYTES])
+    declared = _canonical_encoding(match.group(1).decode('ascii')) if match else None
+
+    try:
+        raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return declared if declared and declared != 'utf-8' else LEGACY_ENCODING
+    # Valid UTF-8: trust a legacy declaration only when it can't matter for decoding (pure ASCII),
+    # so rewritten text is written back in the declared charset
+    if declared and declared != 'utf-8' and raw.isascii():
+        return declared
+    return 'utf-8'
+
+
+def read_html(html_path) -> tuple:
+    """Read an HTML file as NFC text. Returns (markup, source_encoding)."""
+    with open(html_path, 'rb') as f:
+        raw = f.read()
+    encoding = sniff_encoding(raw)
+    markup = raw.decode(encoding, errors='replace')
+    # windows-1258 and NFD exports carry combining tone marks; compose so text matches rewrites
+    if not unicodedata.is_normalized('NFC', markup):
+        markup = unicodedata.normalize('NFC', markup)
+    return markup, encoding
+
+
+def _to_legacy_vietnamese(text: str, encoding: str) -> str:
+    """Compose each NFD cluster only into letters the legacy charset has (ệ -> ê + U+0323)."""
+    def flush(base, marks):
+        changed = True
+        while changed and marks:
+            changed = False
+            for mark in marks:
+                composed = unicodedata.normalize('NFC', base + mark)
+                if len(composed) == 1:
+                    try:
+                        composed.encode(encoding)
+                    except UnicodeEncodeError:
+                        continue
+                    base, changed = composed, True
+                    marks.remove(mark)
+                    break
+        return base + ''.join(marks)
+
+    out, base, marks = [], '', []
+    for ch in unicodedata.normalize('NFD', text):
+        if base and unicodedata.combining(ch):
+            marks.append(ch)
+            continue
+        out.append(flush(base, marks))
+        base, marks = ch, []
+    out.append(flush(base, marks))
+    return ''.join(out)
+
+
+def encode_html(markup: str, encoding: str = 'utf-8') -> bytes:
+    """Encode markup in the page's original encoding."""
+    encoding = encoding or 'utf-8'
+    try:
+        return markup.encode(encoding)
+    except UnicodeEncodeError:
+        if _canonical_encoding(encoding) == 'cp1258':
+            markup = _to_legacy_vietnamese(markup, encoding)
+        return markup.encode(encoding, errors='xmlcharrefreplace')
+
+
+def write_html(html_path, markup: str, encoding: str = 'utf-8'):
+    """Write markup back in the page's original encoding."""
+    with open(html_path, 'wb') as f:
+        f.write(encode_html(markup, encoding))
+
+
+def write_if_changed(path, data: bytes) -> bool:
+    """Atomically write data unless the file already holds these bytes (keeps its mtime). Returns True if written."""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    # Write beside the page and swap it in, so a worker killed mid-write never leaves a truncated page
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    try:
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+    except OSError:
+        pass
+    os.replace(tmp_path, path)
+    return True
+
+
+# --- File hashing ------------------------------------------------------------
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_hash(path) -> str:
+    """SHA-256 hex digest of a file, streamed so large pages aren't read into memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Meta file formats -------------------------------------------------------
+# json:       classic pretty-printed *_meta.json (hand-editable)
+# compact:    *_meta.jsonl    line 1 = header (status, counts, class table, section offsets),
+#                             then one minified section per line
+# compact-gz: *_meta.jsonl.gz same layout, gzip-compressed
+META_FORMATS = {'json': '.json', 'compact': '.jsonl', 'compact-gz': '.jsonl.gz'}
+COMPACT_META_VERSION = 1
+_CLASS_KEYS = ('classes', 'heading_classes')
+
+
+def meta_format_of(meta_path) -> str:
+    """Detect meta format from the file name."""
+    name = str(meta_path)
+    if name.endswith('.jsonl.gz'):
+        return 'compact-gz'
+    if name.endswith('.jsonl'):
+        return 'compact'
+    return 'json'
+
+
+def meta_filename(stem: str, meta_format: str = 'json') -> str:
+    """Meta file name for an HTML stem, e.g. page -> page_meta.jsonl.gz."""
+    return f"{stem}_meta{META_FORMATS[meta_format]}"
+
+
+def _open_binary(meta_path, mode: str):
+    return gzip.open(meta_path, mode) if meta_format_of(meta_path) == 'compact-gz' else open(meta_path, mode)
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _intern_classes(obj: dict, table: list, lookup: dict) -> dict:
+    """Replace class lists in a section/paragraph dict with indices into the class table."""
+    out = dict(obj)
+    for key in _CLASS_KEYS:
+        if key in out:
+            classes = tuple(out[key] or [])
+            if classes not in lookup:
+                lookup[classes] = len(table)
+                table.append(list(classes))
+            out[key] = lookup[classes]
+    return out
+
+
+def _expand_classes(obj: dict, table: list) -> dict:
+    for key in _CLASS_KEYS:
+        if isinstance(obj.get(key), int):
+            obj[key] = list(table[obj[key]])
+    return obj
+
+
+def _write_atomic(meta_path, chunks):
+    tmp_path = f"{meta_path}.tmp"
+    opener = gzip.open if meta_format_of(meta_path) == 'compact-gz' else open
+    with opener(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, meta_path)
+
+
+def save_meta_file(meta_path, metadata: dict):
+    """Write metadata in the format implied by the file name (atomic replace)."""
+    meta_path = str(meta_path)
+    if meta_format_of(meta_path) == 'json':
+        tmp_path = f"{meta_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, meta_path)
+        return
+
+    table, lookup = [], {}
+    lines, offsets, pos = [], [], 0
+    for section in metadata.get('sections', []):
+        sec = _intern_classes(section, table, lookup)
+        sec['paragraphs'] = [_intern_classes(p, table, lookup) for p in sec.get('paragraphs', [])]
+        line = _dumps(sec) + b'\n'
+        offsets.append(pos)
+        pos += len(line)
+        lines.append(line)
+
+    header = {k: v for k, v in metadata.items() if k != 'sections'}
+    header.update({
+        "nova_meta": COMPACT_META_VERSION,
+        "total_sections": len(lines),
+        "rewritten_sections": sum(1 for s in metadata.get('sections', []) if s.get('rewritten_content')),
+        "class_table": table,
+        "section_offsets": offsets
+    })
+    _write_atomic(meta_path, [_dumps(header) + b'\n'] + lines)
+
+
+def _read_header(f) -> dict:
+    header = json.loads(f.readline())
+    if header.get('nova_meta') != COMPACT_META_VERSION:
+        raise ValueError(f"Unsupported compact meta version: {header.get('nova_meta')}")
+    return header
+
+
+def load_meta_file(meta_path, expand_classes: bool = True) -> dict:
+    """
+    Load full metadata (any format) as the classic dict with a 'sections' list.
+    expand_classes=False is the bulk read for text-only consumers: compact sections are
+    decoded in one JSON parse and keep their class-table ids instead of class lists.
+    """
+    if meta_format_of(meta_path) == 'json':
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    with _open_binary(meta_path, 'rb') as f:
+        header = _read_header(f)
+        table = header.pop('class_table')
+        header.pop('section_offsets')
+        header.pop('nova_meta')
+        header.pop('rewritten_sections', None)
+        if not expand_classes:
+            header['sections'] = json.loads(b'[' + b','.join(f.read().splitlines()) + b']')
+            return header
+        sections = []
+        for line in f:
+            sec = _expand_classes(json.loads(line), table)
+            sec['paragraphs'] = [_expand_classes(p, table) for p in sec.get('paragraphs', [])]
+            sections.append(sec)
+    header['sections'] = sections
+    return header
+
+
+def load_meta_header(meta_path) -> dict:
+    """Top-level fields (status, counts, paths) without the sections; reads one line for compact files."""
+    if meta_format_of(meta_path) == 'json':
+        metadata = load_meta_file(meta_path)
+        sections = metadata.pop('sections', [])
+        metadata.setdefault('total_sections', len(sections))
+        metadata['rewritten_sections'] = sum(1 for s in sections if s.get('rewritten_content'))
+        return metadata
+
+    with _open_binary(meta_path, 'rb') as f:
+        header = _read_header(f)
+    for key in ('class_table', 'section_offsets', 'nova_meta'):
+        header.pop(key, None)
+    return header
+
+
+def kept_backup(meta_path, html_path) -> str:
+    """
+    Backup a re-parse must keep recording (None = take a new one). Once a page is past
+    pending_rewrite the updater may have written it, so its first backup is the only
+    copy of the original; an unchanged page simply reuses its backup.
+    """
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        header = load_meta_header(meta_path)
+    except (OSError, ValueError):
+        return None
+    backup = header.get('backup_path')
+    if not backup or not os.path.exists(backup):
+        return None
+    if header.get('status') != 'pending_rewrite' or file_hash(backup) == file_hash(html_path):
+        return backup
+    return None
+
+
+def _seek_section(f, header: dict, index: int) -> dict:
+    """Raw section `index` of a compact body: seek to its recorded offset, scan if the offsets are stale."""
+    body_start = f.tell()
+    offsets = header['section_offsets']
+    if 0 <= index < len(offsets):
+        f.seek(body_start + offsets[index])
+        try:
+            sec = json.loads(f.readline())
+        except ValueError:
+            sec = None
+        if isinstance(sec, dict) and sec.get('index', index) == index:
+            return sec
+    # Offsets no longer match the body (e.g. the file was edited by hand): linear scan
+    f.seek(body_start)
+    for position, line in enumerate(f):
+        sec = json.loads(line)
+        if sec.get('index', position) == index:
+            return sec
+    raise IndexError(f"Section {index} out of range (0-{len(offsets) - 1})")
+
+
+def load_meta_section(meta_path, index: int) -> dict:
+    """Fetch one section by position; compact files seek straight to its line."""
+    if meta_format_of(meta_path) == 'json':
+        return load_meta_file(meta_path)['sections'][index]
+
+    with _open_binary(meta_path, 'rb') as f:
+        header = _read_header(f)
+        table = header['class_table']
+        sec = _expand_classes(_seek_section(f, header, index), table)
+    sec['paragraphs'] = [_expand_classes(p, table) for p in sec.get('paragraphs', [])]
+    return sec
+
+
+def update_meta_header(meta_path, **fields):
+    """Set top-level fields (e.g. status); compact files keep their section lines byte-for-byte."""
+    if meta_format_of(meta_path) == 'json':
+        metadata = load_meta_file(meta_path)
+        metadata.update(fields)
+        save_meta_file(meta_path, metadata)
+        return
+
+    with _open_binary(meta_path, 'rb') as f:
+        header = _read_header(f)
+        body = f.read()
+    header.update(fields)
+    _write_atomic(str(meta_path), [_dumps(header) + b'\n', body])
+
+
+def _rewrite_status(status: str, rewritten: int) -> str:
+    """A page with rewritten sections is ready for the updater; updated pages stay re-appliable."""
+    return 'rewritten' if rewritten and status != 'updated' else status
+
+
+def save_meta_sections(meta_path, sections: dict):
+    """
+    Replace sections by index ({index: section}) and refresh the header: status,
+    rewritten_sections and, for compact files, the class table and section_offsets.
+    The supported way to store rewritten_heading / rewritten_content.
+    """
+    if meta_format_of(meta_path) == 'json':
+        metadata = load_meta_file(meta_path)
+        for index, section in sections.items():
+            if not 0 <= index < len(metadata['sections']):
+                raise IndexError(f"Section {index} out of range (0-{len(metadata['sections']) - 1})")
+            metadata['sections'][index] = section
+        rewritten = sum(1 for s in metadata['sections'] if s.get('rewritten_content'))
+        metadata['status'] = _rewrite_status(metadata.get('status'), rewritten)
+        save_meta_file(meta_path, metadata)
+        return
+
+    with _open_binary(meta_path, 'rb') as f:
+        header = _read_header(f)
+        lines = [line if line.endswith(b'\n') else line + b'\n' for line in f if line.strip()]
+    table = header['class_table']
+    lookup = {tuple(classes): n for n, classes in enumerate(table)}
+    positions = {json.loads(line).get('index', n): n for n, line in enumerate(lines)}
+    for index, section in sections.items():
+        if index not in positions:
+            raise IndexError(f"Section {index} out of range (0-{len(lines) - 1})")
+        sec = _intern_classes(section, table, lookup)
+        sec['paragraphs'] = [_intern_classes(p, table, lookup) for p in sec.get('paragraphs', [])]
+        lines[positions[index]] = _dumps(sec) + b'\n'
+
+    offsets, pos, rewritten = [], 0, 0
+    for line in lines:
+        offsets.append(pos)
+        pos += len(line)
+        rewritten += 1 if json.loads(line).get('rewritten_content') else 0
+    header.update(total_sections=len(lines), rewritten_sections=rewritten, class_table=table,
+                  section_offsets=offsets, status=_rewrite_status(header.get('status'), rewritten))
+    _write_atomic(str(meta_path), [_dumps(header) + b'\n'] + lines)
+
+
+def save_meta_section(meta_path, index: int, section: dict):
+    """Replace one section (see save_meta_sections)."""
+    save_meta_sections(meta_path, {index: section})
@@ -0,0 +1,80 @@
+"""
+Whole-file deduplication of identical pages
+Mirrored exports hold many byte-identical pages (locale mirrors, AMP copies,
+archived snapshots). At discovery every file is bucketed by size and only files
+sharing a size are hashed (streamed SHA-256), so unique pages cost one stat.
+Each group of identical pages keeps one canonical entry (first by path) that is
+parsed; the others get "duplicate_of" and link to the canonical meta file,
+whose header lists every copy with its own backup:
+  "copies": [{"source_file": ..., "backup_path": ...}]
+The rewrite is done once on the canonical meta; html-updater.py fans the update
+out to the copies and rollback restores each copy from its own backup.
+"""
+
+import os
+
+from nova_common import file_hash, load_meta_header, update_meta_header
+
+
+def content_hashes(paths: list) -> dict:
+    """SHA-256 per path, only for files whose size matches another file's."""
+    by_size = {}
+    for path in paths:
+        try:
+            by_size.setdefault(os.stat(path).st_size, []).append(path)
+        except OSError:
+            continue
+    hashes = {}
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+        for path in group:
+            try:
+                hashes[path] = file_hash(path)
+            except OSError:
+                continue
+    return hashes
+
+
+def dedupe_manifest(manifest: dict) -> int:
+    """Mark entries whose bytes equal an earlier entry's with duplicate_of. Returns duplicates found."""
+    hashes = content_hashes([f["source"] for f in manifest["files"]])
+    canonical = {}
+    found = 0
+    for file_info in manifest["files"]:
+        digest = hashes.get(file_info["source"])
+        if digest is None:
+            continue
+        file_info["content_hash"] = digest
+        first = canonical.setdefault(digest, file_info["source"])
+        if first != file_info["source"]:
+            file_info["duplicate_of"] = first
+            found += 1
+    return found
+
+
+def dependents(manifest: dict, source: str) -> list:
+    """Entries linked to the canonical page at source."""
+    return [f for f in manifest["files"] if f.get("duplicate_of") == source]
+
+
+def copy_backups(header: dict) -> dict:
+    """source_file -> backup_path for the copies recorded in a meta header."""
+    return {c["source_file"]: c["backup_path"] for c in header.get("copies") or []}
+
+
+def add_copies(meta_file: str, copies: list):
+    """Record copies (source_file + backup_path) on the canonical meta header."""
+    known = {c["source_file"]: c for c in load_meta_header(meta_file).get("copies") or []}
+    known.update((c["source_file"], c) for c in copies)
+    update_meta_header(meta_file, copies=sorted(known.values(), key=lambda c: c["source_file"]))
+
+
+def remove_copies(meta_file: str, sources: list):
+    """Drop copies that no longer mirror the canonical page (edited, deleted)."""
+    if not meta_file or not os.path.exists(meta_file):
+        return
+    header = load_meta_header(meta_file)
+    copies = [c for c in header.get("copies") or [] if c["source_file"] not in set(sources)]
+    if len(copies) != len(header.get("copies") or []):
+        update_meta_header(meta_file, copies=copies)
@@ -0,0 +1,221 @@
+"""
+Site-wide duplicate title / description / heading index (cannibalization check)
+Every meta file contributes its title, description and H1/H2 texts (rewritten
+value when present). Each text gets
+  - a normalized key (casefold, punctuation and spacing removed): equal keys = exact duplicates
+  - MinHash LSH band hashes over word 1-2 grams: shared bands = near-duplicate candidates
+so groups come from hash buckets in O(n) instead of comparing every pair.
+The index is cached next to the manifest, one entry per page (identical copies
+share a meta file but still count as separate pages), and only meta files whose
+mtime/size changed are re-read.
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+
+from nova_common import load_meta_file
+
+INDEX_FILE_NAME = "duplicate_index.json"
+INDEX_VERSION = 2
+FIELDS = ['title', 'description', 'h1', 'h2']
+
+NUM_BANDS = 8
+ROWS_PER_BAND = 4           # 32 MinHash values; pairs above ~0.6 Jaccard usually share a band
+NEAR_THRESHOLD = 0.6        # Jaccard of word 1-2 grams confirmed within a bucket
+_MERSENNE = (1 << 61) - 1
+_PERMUTATIONS = [((i * 0x9E3779B97F4A7C15 + 1) % _MERSENNE | 1, (i * 0xC2B2AE3D27D4EB4F) % _MERSENNE)
+                 for i in range(NUM_BANDS * ROWS_PER_BAND)]
+_PUNCT_RE = re.compile(r'[^\w]+')
+
+
+def normalize(text: str) -> str:
+    return ' '.join(_PUNCT_RE.sub(' ', unicodedata.normalize('NFC', text).casefold()).split())
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def shingles(normalized: str) -> set:
+    words = normalized.split()
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def band_hashes(normalized: str) -> list:
+    """LSH band hashes of the MinHash signature (one short hex string per band)."""
+    hashed = [_hash64(s) for s in shingles(normalized)]
+    if not hashed:
+        return []
+    signature = [min((a * h + b) % _MERSENNE for h in hashed) for a, b in _PERMUTATIONS]
+    return [hashlib.blake2b(repr(signature[i:i + ROWS_PER_BAND]).encode(), digest_size=6).hexdigest()
+            for i in range(0, len(signature), ROWS_PER_BAND)]
+
+
+def page_texts(metadata: dict) -> dict:
+    """Texts a page will ship with, per field (rewritten values win)."""
+    texts = {field: [] for field in FIELDS}
+    title = metadata.get('rewritten_title') or metadata.get('original_title')
+    description = metadata.get('rewritten_description') or metadata.get('original_description')
+    if title:
+        texts['title'].append(title)
+    if description:
+        texts['description'].append(description)
+    for section in metadata.get('sections', []):
+        if section.get('heading_tag') in ('h1', 'h2'):
+            heading = section.get('rewritten_heading') or section.get('heading_text')
+            if heading:
+                texts[section['heading_tag']].append(heading)
+    return texts
+
+
+def index_meta_file(meta_file: str) -> dict:
+    fields = {}
+    for field, texts in page_texts(load_meta_file(meta_file)).items():
+        entries = []
+        for text in texts:
+            norm = normalize(text)
+            if norm:
+                entries.append({"text": text, "key": hashlib.blake2b(norm.encode('utf-8'), digest_size=8).hexdigest(),
+                                "bands": band_hashes(norm)})
+        fields[field] = entries
+    return fields
+
+
+def _stat(path: str):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def update_index(manifest_path: str) -> tuple:
+    """Refresh the cached index for changed meta files. Returns (index, counts)."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    index_path = Path(manifest_path).resolve().parent / INDEX_FILE_NAME
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        pages = cached.get("pages", {}) if cached.get("version") == INDEX_VERSION else {}
+    except (OSError, json.JSONDecodeError):
+        pages = {}
+
+    counts = {"reused": 0, "refreshed": 0, "removed": 0}
+    current, fresh = {}, {}
+    for entry in manifest.get('files', []):
+        meta_file = entry.get('meta_file')
+        if not meta_file or not Path(meta_file).exists():
+            continue
+        mtime_ns, size = _stat(meta_file)
+        name = entry.get('relative_path', meta_file)
+        page = pages.get(name)
+        if page and page["meta_file"] == meta_file and page["mtime_ns"] == mtime_ns and page["size"] == size:
+            counts["reused"] += 1
+        else:
+            shared = fresh.get(meta_file)
+            page = {"meta_file": meta_file, "mtime_ns": mtime_ns, "size": size,
+                    "fields": shared if shared is not None else index_meta_file(meta_file)}
+            fresh[meta_file] = page["fields"]
+            counts["refreshed"] += 1
+        page["page"] = name
+        current[name] = page
+    counts["removed"] = len(set(pages) - set(current))
+
+    index = {"version": INDEX_VERSION, "manifest": str(Path(manifest_path).resolve()), "pages": current}
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+    return index, counts
+
+
+def _find(parent: dict, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def find_duplicates(index: dict, fields: list = None, threshold: float = NEAR_THRESHOLD) -> dict:
+    """Exact groups (same normalized key) and near groups (LSH buckets, confirmed by Jaccard), per field."""
+    report = {}
+    for field in fields or FIELDS:
+        # One item per (page, normalized text); a page repeating its own H2 is not cannibalization
+        items, seen = [], set()
+        for page in index["pages"].values():
+            for entry in page["fields"].get(field, []):
+                if (page["page"], entry["key"]) not in seen:
+                    seen.add((page["page"], entry["key"]))
+                    items.append((page["page"], entry))
+
+        exact = {}
+        for n, (_, entry) in enumerate(items):
+            exact.setdefault(entry["key"], []).append(n)
+        exact_groups = [{"text": items[members[0]][1]["text"], "count": len(members),
+                         "pages": [items[m][0] for m in members]}
+                        for members in exact.values() if len(members) > 1]
+
+        # Near duplicates: one representative per exact key, union within band buckets
+        reps = [members[0] for members in exact.values()]
+        parent = {r: r for r in reps}
+        cache = {}
+
+        def grams(n):
+            if n not in cache:
+                cache[n] = shingles(normalize(items[n][1]["text"]))
+            return cache[n]
+
+        buckets = {}
+        for r in reps:
+            for band_no, band in enumerate(items[r][1]["bands"]):
+                buckets.setdefault((band_no, band), []).append(r)
+        for members in buckets.values():
+            head = members[0]
+            for other in members[1:]:
+                if _find(parent, head) == _find(parent, other):
+                    continue
+                a, b = grams(head), grams(other)
+                if len(a & b) / len(a | b) >= threshold:
+                    parent[_find(parent, other)] = _find(parent, head)
+
+        clusters = {}
+        for r in reps:
+            clusters.setdefault(_find(parent, r), []).append(r)
+        near_groups = []
+        for members in clusters.values():
+            if len(members) < 2:
+                continue
+            variants = [{"text": items[r][1]["text"], "pages": [items[m][0] for m in exact[items[r][1]["key"]]]}
+                        for r in members]
+            near_groups.append({"count": sum(len(v["pages"]) for v in variants), "variants": variants})
+
+        report[field] = {
+            "exact": sorted(exact_groups, key=lambda g: -g["count"]),
+            "near": sorted(near_groups, key=lambda g: -g["count"]),
+        }
+    return report
+
+
+def duplicate_report(manifest_path: str, fields: list = None, threshold: float = NEAR_THRESHOLD) -> dict:
+    index, counts = update_index(manifest_path)
+    return {"pages": len(index["pages"]), "index": counts,
+            "fields": find_duplicates(index, fields, threshold)}
+
+
+def print_duplicates(report: dict, examples: int = 5):
+    """Print duplicate groups in the --status style."""
+    idx = report["index"]
+    print(f"\n🔁 Duplicates: {report['pages']} pages indexed "
+          f"({idx['refreshed']} refreshed, {idx['reused']} cached, {idx['removed']} dropped)")
+    for field, groups in report["fields"].items():
+        exact, near = groups["exact"], groups["near"]
+        print(f"   {field:12} exact groups: {len(exact):4} ({sum(g['count'] for g in exact)} pages)   "
+              f"near groups: {len(near):4} ({sum(g['count'] for g in near)} pages)")
+        for group in exact[:examples]:
+            print(f"      = {group['count']}× \"{group['text'][:70]}\": {', '.join(group['pages'][:3])}"
+                  + (" …" if group['count'] > 3 else ""))
+        for group in near[:examples]:
+            texts = ' | '.join(f"\"{v['text'][:40]}\"" for v in group['variants'][:3])
+            print(f"      ≈ {group['count']}× {texts}")
@@ -0,0 +1,245 @@
+"""
+E (Evidence) operator tooling
+Pulls numeric claims (RTP, odds, bonus percentages, currency amounts) out of
+rewritten text with compiled patterns and looks each one up in a local SQLite
+evidence registry of entity (game/provider/operator) →
+verified values with their sources. One streaming pass over a manifest yields
+a per-page compliance report (EGM colors: green = every claim verified,
+yellow = values found but not tied to a named entity, red = mismatch or no source).
+"""
+
+import csv
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from nova_common import load_meta_file
+
+# Config setting: NOVA_EVIDENCE_DB=/path/to/evidence.db
+EVIDENCE_DB_ENV_VAR = 'NOVA_EVIDENCE_DB'
+# A bare percentage ("100% tiếng Việt") is not a claim: only percentages tied to RTP or a bonus are checked
+CLAIM_KINDS = ['rtp', 'odds', 'bonus_pct', 'amount']
+
+# Allowed difference between a claim and a registry value, per kind
+TOLERANCE = {'rtp': 0.05, 'odds': 0.005, 'bonus_pct': 0.5, 'amount': 0.5}
+DEFAULT_UNITS = {'rtp': '%', 'odds': '', 'bonus_pct': '%', 'amount': 'VND'}
+ENTITY_WINDOW_CHARS = 120   # entity must be named this close before the claim (same sentence)
+
+VERIFIED, MISMATCH, UNATTRIBUTED, UNSOURCED = 'verified', 'mismatch', 'unattributed', 'unsourced'
+PAGE_GRADE = {VERIFIED: 'green', UNATTRIBUTED: 'yellow', MISMATCH: 'red', UNSOURCED: 'red'}
+
+_NUM = r'\d+(?:[.,]\d+)?'
+_CLAIM_PATTERNS = [
+    ('rtp', re.compile(rf'\bRTP\b\D{{0,20}}?({_NUM})\s*%', re.IGNORECASE)),
+    ('odds', re.compile(rf'\b(?:odds|tỷ lệ cược|tỉ lệ cược|tỷ lệ kèo|kèo)\b\D{{0,12}}?({_NUM})(?![\d.,]*\s*%)',
+                       re.IGNORECASE)),
+    ('bonus_pct', re.compile(rf'\b(?:thưởng|bonus|khuyến mãi|hoàn trả|cashback)\b[^.%\d]{{0,30}}({_NUM})\s*%',
+                             re.IGNORECASE)),
+    ('amount', re.compile(r'(?:(\$|USD\s?)(\d{1,3}(?:[.,]\d{3})+|\d+(?:[.,]\d+)?)\s*(triệu|nghìn|ngàn|tỷ|k)?'
+                          r'|(\d{1,3}(?:[.,]\d{3})+|\d+(?:[.,]\d+)?)\s*(triệu|nghìn|ngàn|tỷ|k)?\s*'
+                          r'(VNĐ|VND|đồng|₫|USD|\$))(?!\w)', re.IGNORECASE)),
+]
+_MULTIPLIERS = {'k': 1e3, 'nghìn': 1e3, 'ngàn': 1e3, 'triệu': 1e6, 'tỷ': 1e9}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    entity      TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    value       REAL NOT NULL,
+    unit        TEXT NOT NULL DEFAULT '',
+    source      TEXT NOT NULL,
+    verified_at TEXT,
+    PRIMARY KEY (entity, kind, value, unit)
+);
+CREATE INDEX IF NOT EXISTS evidence_kind_value ON evidence (kind, value);
+"""
+
+
+def _number(text: str, grouped: bool = False) -> float:
+    """
+    '96,5' / '96.5' / '1.875' → decimal. With grouped (amounts only), '1.000.000' /
+    '1,000,000' / '1.875' use ./, as thousands separators → 1000000 / 1875.
+    """
+    if grouped and re.fullmatch(r'\d{1,3}(?:[.,]\d{3})+', text):
+        return float(re.sub(r'[.,]', '', text))
+    return float(text.replace(',', '.'))
+
+
+def _currency(symbol: str) -> str:
+    symbol = symbol.strip().upper()
+    return 'USD' if symbol in ('$', 'USD') else 'VND'
+
+
+def extract_claims(text: str) -> list:
+    """Numeric claims in text as {kind, value, unit, text, start}; each span is claimed once, most specific first."""
+    claims, taken = [], []
+    for kind, pattern in _CLAIM_PATTERNS:
+        for m in pattern.finditer(text):
+            if any(m.start() < end and start < m.end() for start, end in taken):
+                continue
+            if kind == 'amount':
+                symbol, number, scale = (m.group(1), m.group(2), m.group(3)) if m.group(2) else \
+                    (m.group(6), m.group(4), m.group(5))
+                value, unit = _number(number, grouped=True) * _MULTIPLIERS.get((scale or '').lower(), 1), _currency(symbol)
+            else:
+                value, unit = _number(m.group(1)), '%' if kind != 'odds' else ''
+            taken.append((m.start(), m.end()))
+            claims.append({"kind": kind, "value": value, "unit": unit, "text": m.group(0).strip(),
+                           "start": m.start()})
+    return sorted(claims, key=lambda c: c["start"])
+
+
+def resolve_db(path: str = None) -> str:
+    path = path or os.environ.get(EVIDENCE_DB_ENV_VAR)
+    if not path:
+        raise ValueError(f"No evidence registry given (--db or ${EVIDENCE_DB_ENV_VAR})")
+    return path
+
+
+def open_registry(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def import_csv(conn: sqlite3.Connection, csv_path: str) -> int:
+    """Load entity,kind,value[,unit],source[,verified_at] rows; rows without a source are rejected."""
+    rows = []
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for n, row in enumerate(csv.DictReader(f), start=2):
+            if not (row.get('source') or '').strip():
+                raise ValueError(f"{csv_path}:{n}: every value needs a source")
+            if row['kind'] not in CLAIM_KINDS:
+                raise ValueError(f"{csv_path}:{n}: unknown kind '{row['kind']}' (choose: {', '.join(CLAIM_KINDS)})")
+            unit = (row.get('unit') or DEFAULT_UNITS[row['kind']]).strip()
+            value = _number(row['value'].strip(), grouped=row['kind'] == 'amount')
+            rows.append((row['entity'].strip(), row['kind'], value, unit,
+                         row['source'].strip(), row.get('verified_at') or datetime.now().date().isoformat()))
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO evidence VALUES (?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+class EvidenceRegistry:
+    """Indexed lookups against the evidence table; entity names are matched with one compiled pattern."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.entities = {name.casefold(): name for (name,) in conn.execute("SELECT DISTINCT entity FROM evidence")}
+        names = sorted(self.entities, key=len, reverse=True)
+        self.entity_re = re.compile(r'(?<!\w)(' + '|'.join(re.escape(n) for n in names) + r')(?!\w)',
+                                    re.IGNORECASE) if names else None
+
+    def entity_mentions(self, text: str) -> list:
+        if not self.entity_re:
+            return []
+        return [(m.start(), self.entities[m.group(1).casefold()]) for m in self.entity_re.finditer(text)]
+
+    def check(self, claim: dict, entity: str = None) -> dict:
+        low, high = claim["value"] - TOLERANCE[claim["kind"]], claim["value"] + TOLERANCE[claim["kind"]]
+        if entity:
+            rows = self.conn.execute("SELECT value, source FROM evidence WHERE entity = ? AND kind = ? AND unit = ?",
+                                     (entity, claim["kind"], claim["unit"])).fetchall()
+            match = next((source for value, source in rows if low <= value <= high), None)
+            if match:
+                return {"status": VERIFIED, "entity": entity, "source": match}
+            if rows:
+                return {"status": MISMATCH, "entity": entity, "expected": sorted(v for v, _ in rows)}
+        row = self.conn.execute("SELECT entity, source FROM evidence WHERE kind = ? AND unit = ? AND value BETWEEN ? AND ?"
+                                " LIMIT 1", (claim["kind"], claim["unit"], low, high)).fetchone()
+        if row:
+            return {"status": UNATTRIBUTED, "entity": entity, "candidate": row[0], "source": row[1]}
+        return {"status": UNSOURCED, "entity": entity}
+
+
+def _page_texts(metadata: dict):
+    """(where, text) for rewritten copy only; original text isn't what we publish."""
+    for field in ('rewritten_title', 'rewritten_description'):
+        if metadata.get(field):
+            yield field, metadata[field]
+    for section in metadata.get('sections', []):
+        for field in ('rewritten_heading', 'rewritten_content'):
+            if section.get(field):
+                yield f"section[{section.get('index')}].{field}", section[field]
+
+
+def check_page(registry: EvidenceRegistry, metadata: dict) -> dict:
+    page_entities = registry.entity_mentions(metadata.get('rewritten_title') or metadata.get('original_title') or '')
+    default_entity = page_entities[0][1] if len(page_entities) == 1 else None
+    claims = []
+    for where, text in _page_texts(metadata):
+        mentions = registry.entity_mentions(text)
+        for claim in extract_claims(text):
+            # Nearest entity named shortly before the claim, else the page's single title entity
+            near = [name for pos, name in mentions if claim["start"] - ENTITY_WINDOW_CHARS <= pos < claim["start"]]
+            result = registry.check(claim, near[-1] if near else default_entity)
+            claims.append(dict(result, kind=claim["kind"], value=claim["value"], unit=claim["unit"],
+                               text=claim["text"], where=where))
+
+    grades = [PAGE_GRADE[c["status"]] for c in claims]
+    grade = 'red' if 'red' in grades else 'yellow' if 'yellow' in grades else 'green'
+    counts = {}
+    for c in claims:
+        counts[c["status"]] = counts.get(c["status"], 0) + 1
+    return {"grade": grade, "claims": claims, "counts": counts}
+
+
+def check_manifest(manifest_path: str, db_path: str, report_path: str = None):
+    """Stream every meta file once; yields one page result at a time (also written as JSON lines)."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    conn = open_registry(db_path)
+    registry = EvidenceRegistry(conn)
+    out = open(report_path, 'w', encoding='utf-8') if report_path else None
+    try:
+        for entry in manifest.get('files', []):
+            meta_file = entry.get('meta_file')
+            if not meta_file or not Path(meta_file).exists() or entry.get('duplicate_of'):
+                # Identical copies share their canonical page's meta file: check it once
+                continue
+            result = dict(check_page(registry, load_meta_file(meta_file)),
+                          page=entry.get('relative_path', meta_file), meta_file=meta_file)
+            if out:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            yield result
+    finally:
+        if out:
+            out.close()
+        conn.close()
+
+
+def evidence_report(manifest_path: str, db_path: str, report_path: str = None, max_listed: int = 20) -> dict:
+    """Totals over the streaming pass; keeps only the first max_listed non-green pages."""
+    totals = {"pages": 0, "claims": 0, "grades": {"green": 0, "yellow": 0, "red": 0}, "statuses": {}}
+    flagged = []
+    for page in check_manifest(manifest_path, db_path, report_path):
+        totals["pages"] += 1
+        totals["claims"] += len(page["claims"])
+        totals["grades"][page["grade"]] += 1
+        for status, n in page["counts"].items():
+            totals["statuses"][status] = totals["statuses"].get(status, 0) + n
+        if page["grade"] != 'green' and len(flagged) < max_listed:
+            flagged.append({"page": page["page"], "grade": page["grade"],
+                            "claims": [c for c in page["claims"] if c["status"] != VERIFIED]})
+    return dict(totals, flagged=flagged, report=report_path)
+
+
+def print_evidence_report(report: dict, examples: int = 5):
+    """Print the compliance summary in the --status style."""
+    g = report["grades"]
+    print(f"\n🔎 Evidence: {report['pages']} pages, {report['claims']} numeric claims")
+    print(f"   🟢 {g['green']}  🟡 {g['yellow']}  🔴 {g['red']}   "
+          + ", ".join(f"{k} {v}" for k, v in sorted(report["statuses"].items())))
+    for page in report["flagged"][:examples]:
+        icon = '🔴' if page["grade"] == 'red' else '🟡'
+        print(f"   {icon} {page['page']}")
+        for claim in page["claims"][:3]:
+            detail = f"expected {claim['expected']}" if claim["status"] == MISMATCH else \
+                f"registry has {claim['candidate']}" if claim["status"] == UNATTRIBUTED else "no source"
+            print(f"      - \"{claim['text']}\" ({claim['kind']}, {claim.get('entity') or 'no entity'}): "
+                  f"{claim['status']}, {detail}")
+    if report.get("report"):
+        print(f"   Per-page report: {report['report']}")
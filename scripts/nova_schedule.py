@@ -0,0 +1,107 @@
+"""
+Batch work ordering
+Orders manifest entries by a pluggable key: sorted path (default), largest file
+first (so one huge page doesn't leave a parallel pool waiting at the tail), or
+business priority from a priority list / sitemap.xml ("top pages first"), with
+largest-first among equal priorities.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+SITEMAP_DEFAULT_PRIORITY = 0.5
+
+
+def _file_size(file_info: dict) -> int:
+    try:
+        return os.path.getsize(file_info["source"])
+    except OSError:
+        return 0
+
+
+# Sort keys (ascending); add an entry here to plug in another ordering
+ORDER_KEYS = {
+    'path': lambda f: f.get("relative_path", ""),
+    'largest': lambda f: (-_file_size(f), f.get("relative_path", "")),
+    'priority': lambda f: (-f.get("priority", 0), -_file_size(f), f.get("relative_path", "")),
+}
+SCHEDULE_ORDERS = list(ORDER_KEYS)
+
+
+def schedule(items: list, order: str = 'path', entry=lambda item: item) -> list:
+    """Return items sorted by the named order; entry() picks the manifest entry out of an item."""
+    if order not in ORDER_KEYS:
+        raise ValueError(f"Unknown order '{order}' (choose: {', '.join(SCHEDULE_ORDERS)})")
+    key = ORDER_KEYS[order]
+    return sorted(items, key=lambda item: key(entry(item)))
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _load_sitemap(path: str) -> dict:
+    """<url><loc>/<priority> pairs from a sitemap.xml (missing priority = 0.5)."""
+    weights = {}
+    for _, elem in ET.iterparse(path):
+        if _local_name(elem.tag) != 'url':
+            continue
+        loc, priority = None, SITEMAP_DEFAULT_PRIORITY
+        for child in elem:
+            name = _local_name(child.tag)
+            if name == 'loc' and child.text:
+                loc = child.text.strip()
+            elif name == 'priority' and child.text:
+                try:
+                    priority = float(child.text)
+                except ValueError:
+                    pass
+        if loc:
+            weights[loc] = max(priority, weights.get(loc, 0))
+        elem.clear()
+    return weights
+
+
+def _load_list(path: str) -> dict:
+    """One path or URL per line, most important first; an optional second column sets the weight."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.split() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    weights = {}
+    for rank, parts in enumerate(lines):
+        weight = float(parts[1]) if len(parts) > 1 else len(lines) - rank
+        weights.setdefault(parts[0], weight)
+    return weights
+
+
+def load_priorities(path: str) -> dict:
+    """Priority weights keyed by URL or relative path, from a sitemap (.xml) or a plain list."""
+    return _load_sitemap(path) if Path(path).suffix.lower() == '.xml' else _load_list(path)
+
+
+def _candidates(key: str) -> list:
+    """Relative paths a URL or listed path may refer to."""
+    path = unquote(urlparse(key).path) if '://' in key else key
+    path = path.replace('\\', '/').strip('/')
+    if not path:
+        return ['index.html']
+    return [path, f"{path}.html", f"{path}/index.html"]
+
+
+def apply_priorities(files: list, weights: dict) -> int:
+    """Store each entry's weight as file_info["priority"]; returns how many entries matched."""
+    by_path = {}
+    for key, weight in weights.items():
+        for candidate in _candidates(key):
+            by_path[candidate] = max(weight, by_path.get(candidate, 0))
+
+    matched = 0
+    for file_info in files:
+        weight = by_path.get(file_info.get("relative_path", "").replace('\\', '/'))
+        if weight is None:
+            file_info.pop("priority", None)
+        else:
+            file_info["priority"] = weight
+            matched += 1
+    return matched
@@ -0,0 +1,223 @@
+"""
+Live batch telemetry
+Rolling-window throughput, latency percentiles, ETA and error rate for batch runs,
+flushed every few seconds to <output>/telemetry/<name>.json (and optionally a
+Prometheus textfile) so `batch-processor.py --status` can show a running batch.
+A timer thread keeps flushing while a slow file is in flight, so the batch only
+goes stale when its process is gone.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+TELEMETRY_DIR_NAME = "telemetry"
+DEFAULT_WINDOW_SECONDS = 60.0
+DEFAULT_FLUSH_SECONDS = 5.0
+STALE_AFTER_SECONDS = 30.0
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class BatchTelemetry:
+    """Collects per-file results and periodically writes a status snapshot."""
+
+    def __init__(self, output_dir, name: str = "batch", total_files: int = 0,
+                 window: float = DEFAULT_WINDOW_SECONDS, flush_every: float = DEFAULT_FLUSH_SECONDS,
+                 prometheus: bool = False):
+        self.path = Path(output_dir) / TELEMETRY_DIR_NAME / f"{name}.json"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.total_files = total_files
+        self.window = window
+        self.flush_every = flush_every
+        self.prometheus = prometheus
+        self.started = time.time()
+        self.samples = deque()  # (finished_at, bytes, seconds, ok)
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.queue = {}
+        self.in_flight = 0
+        self.last_flush = 0.0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._timer = None
+
+    def start(self):
+        """Flush every flush_every seconds from a daemon thread until close()."""
+        if self._timer is None:
+            self._timer = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+            self._timer.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.flush_every):
+            self.flush()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, *exc):
+        self.close("failed" if exc_type else "finished")
+
+    def begin(self):
+        """A file started; it counts as in flight until record()."""
+        with self._lock:
+            self.in_flight += 1
+
+    def record(self, size: int, seconds: float, ok: bool = True):
+        """Record one finished file and flush if the refresh interval passed."""
+        now = time.time()
+        with self._lock:
+            self.samples.append((now, size, seconds, ok))
+            self.done += 1
+            self.failed += 0 if ok else 1
+            self.bytes += size
+            self.in_flight = max(self.in_flight - 1, 0)
+        self.maybe_flush(now)
+
+    def set_queue(self, **depths):
+        """Queue depths for parallel runs, e.g. set_queue(pending=120, in_flight=4)."""
+        with self._lock:
+            self.queue.update(depths)
+
+    def snapshot(self, now: float = None, state: str = "running") -> dict:
+        now = now or time.time()
+        with self._lock:
+            return self._snapshot(now, state)
+
+    def _snapshot(self, now: float, state: str) -> dict:
+        while self.samples and self.samples[0][0] < now - self.window:
+            self.samples.popleft()
+
+        span = min(self.window, max(now - self.started, 1e-6))
+        window_files = len(self.samples)
+        files_per_sec = window_files / span
+        latencies = sorted(s[2] for s in self.samples)
+        remaining = max(self.total_files - self.done, 0)
+        return {
+            "name": self.name,
+            "state": state,
+            "pid": os.getpid(),
+            "updated_at": now,
+            "started_at": self.started,
+            "total_files": self.total_files,
+            "done": self.done,
+            "failed": self.failed,
+            "remaining": remaining,
+            "in_flight": self.in_flight,
+            "bytes": self.bytes,
+            "window_seconds": self.window,
+            "files_per_sec": round(files_per_sec, 3),
+            "bytes_per_sec": round(sum(s[1] for s in self.samples) / span, 1),
+            "error_rate": round(sum(1 for s in self.samples if not s[3]) / window_files, 4) if window_files else 0.0,
+            "latency_p50": round(_percentile(latencies, 50), 4),
+            "latency_p95": round(_percentile(latencies, 95), 4),
+            "latency_p99": round(_percentile(latencies, 99), 4),
+            "eta_seconds": round(remaining / files_per_sec) if files_per_sec > 0 else None,
+            "queue": dict(self.queue),
+        }
+
+    def maybe_flush(self, now: float = None):
+        now = now or time.time()
+        if now - self.last_flush >= self.flush_every:
+            self.flush(now)
+
+    def flush(self, now: float = None, state: str = "running"):
+        """Atomically write the JSON snapshot (and Prometheus textfile if enabled)."""
+        now = now or time.time()
+        with self._lock:
+            snap = self._snapshot(now, state)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snap, f, indent=2)
+            os.replace(tmp_path, self.path)
+            if self.prometheus:
+                self._write_prometheus(snap)
+            self.last_flush = now
+
+    def close(self, state: str = "finished"):
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        self.flush(state=state)
+
+    def _write_prometheus(self, snap: dict):
+        label = f'batch="{self.name}"'
+        lines = [
+            f"nova_batch_files_total{{{label}}} {snap['total_files']}",
+            f"nova_batch_files_done{{{label}}} {snap['done']}",
+            f"nova_batch_files_failed{{{label}}} {snap['failed']}",
+            f"nova_batch_files_in_flight{{{label}}} {snap['in_flight']}",
+            f"nova_batch_bytes_done{{{label}}} {snap['bytes']}",
+            f"nova_batch_files_per_second{{{label}}} {snap['files_per_sec']}",
+            f"nova_batch_bytes_per_second{{{label}}} {snap['bytes_per_sec']}",
+            f"nova_batch_error_rate{{{label}}} {snap['error_rate']}",
+            f"nova_batch_eta_seconds{{{label}}} {snap['eta_seconds'] if snap['eta_seconds'] is not None else 'NaN'}",
+        ]
+        for q in (50, 95, 99):
+            lines.append(f"nova_batch_latency_seconds{{{label},quantile=\"0.{q}\"}} {snap[f'latency_p{q}']}")
+        for queue, depth in snap["queue"].items():
+            lines.append(f"nova_batch_queue_depth{{{label},queue=\"{queue}\"}} {depth}")
+        prom_path = self.path.with_suffix(".prom")
+        tmp_path = f"{prom_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, prom_path)
+
+
+def read_telemetry(output_dir) -> list:
+    """All telemetry snapshots under an output dir (one per batch run / shard worker)."""
+    snaps = []
+    for path in sorted(Path(output_dir).glob(f"{TELEMETRY_DIR_NAME}/*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snaps.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return snaps
+
+
+def _duration(seconds) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m" if seconds >= 3600 else f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+def print_telemetry(snaps: list):
+    """Print live telemetry in the --status style."""
+    if not snaps:
+        return
+    now = time.time()
+    print("\n📡 Telemetry:")
+    for snap in snaps:
+        state = snap.get("state", "running")
+        if state == "running" and now - snap.get("updated_at", 0) > STALE_AFTER_SECONDS:
+            state = "stale"
+        in_flight = f" ({snap['in_flight']} in flight)" if snap.get("in_flight") else ""
+        print(f"   [{snap['name']}] {state} – {snap['done']}/{snap['total_files']} files{in_flight}, "
+              f"{snap['files_per_sec']:.2f} files/s, {snap['bytes_per_sec'] / 1024:.1f} KB/s, "
+              f"errors {snap['error_rate'] * 100:.1f}%, ETA {_duration(snap.get('eta_seconds'))}")
+        print(f"      latency p50={snap['latency_p50'] * 1000:.0f}ms p95={snap['latency_p95'] * 1000:.0f}ms "
+              f"p99={snap['latency_p99'] * 1000:.0f}ms"
+              + (f", queue {snap['queue']}" if snap.get("queue") else "")
+              + f" (updated {datetime.fromtimestamp(snap['updated_at']):%H:%M:%S})")
+
+    running = [s for s in snaps if s.get("state") == "running" and now - s.get("updated_at", 0) <= STALE_AFTER_SECONDS]
+    if len(running) > 1:
+        # Shard workers share one remaining-files count; their rates add up
+        rate = sum(s["files_per_sec"] for s in running)
+        remaining = max(s["remaining"] for s in running)
+        print(f"   Σ {len(running)} workers: {rate:.2f} files/s, ETA {_duration(remaining / rate if rate else None)}")
@@ -0,0 +1,196 @@
+"""
+Recyclable worker processes with per-task wall-clock and memory limits
+A pathological page can't stall a batch: a task that overruns its timeout gets
+its worker killed and replaced, and workers are restarted after N tasks or once
+their RSS passes a ceiling (slow leaks in bs4/lxml trees).
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing.connection import wait
+
+# Outcome statuses
+OK, ERROR, TIMEOUT, MEMORY, CRASHED = 'ok', 'error', 'timeout', 'memory', 'crashed'
+_IDLE_POLL_SECONDS = 0.05
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (0 if unknown)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except ImportError:
+            return 0.0
+
+
+def _worker_main(conn, func, memory_limit_mb):
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = int(memory_limit_mb * 1024 * 1024)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        key, args = task
+        try:
+            status, payload = OK, func(*args)
+        except MemoryError:
+            status, payload = MEMORY, "MemoryError: memory limit exceeded"
+        except Exception as e:
+            status, payload = ERROR, f"{type(e).__name__}: {e}"
+        conn.send((key, status, payload, current_rss_mb()))
+
+
+class _Worker:
+    def __init__(self, ctx, func, memory_limit_mb):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, func, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+        self.task = None  # (key, started_at, deadline)
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class FileWorkerPool:
+    """
+    Run func(*args) in worker processes, one task per worker at a time.
+    Tasks are (key, args, timeout_seconds); outcomes are dicts with
+    key, status (ok/error/timeout/memory/crashed), result/error and seconds.
+    """
+
+    def __init__(self, func, workers: int = 1, max_tasks: int = 0, max_rss_mb: float = 0,
+                 memory_limit_mb: float = 0, start_method: str = None):
+        self.func = func
+        self.size = max(1, workers)
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+        self.memory_limit_mb = memory_limit_mb
+        # Callers that feed tasks from another thread should pass 'forkserver' or 'spawn':
+        # forking while that thread holds a lock can deadlock the replacement worker
+        self.ctx = multiprocessing.get_context(start_method)
+        self.workers = []
+        self.recycled = 0
+
+    def __enter__(self):
+        self.workers = [self._spawn() for _ in range(self.size)]
+        return self
+
+    def __exit__(self, *exc):
+        for worker in self.workers:
+            worker.stop(kill=worker.task is not None)
+        self.workers = []
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.ctx, self.func, self.memory_limit_mb)
+
+    def _replace(self, worker: _Worker, kill: bool):
+        worker.stop(kill=kill)
+        self.workers[self.workers.index(worker)] = self._spawn()
+        self.recycled += 1
+
+    @property
+    def in_flight(self) -> int:
+        return sum(1 for w in self.workers if w.task)
+
+    def run(self, tasks, on_result):
+        """
+        Feed tasks from an iterable, or from a queue.Queue terminated by None
+        (for streaming sources), and call on_result(outcome) as tasks finish.
+        """
+        source = tasks if isinstance(tasks, queue.Queue) else None
+        iterator = None if source else iter(tasks)
+        exhausted = False
+
+        while True:
+            # Hand out work to idle workers
+            for worker in self.workers:
+                if worker.task or exhausted:
+                    continue
+                try:
+                    task = source.get_nowait() if source else next(iterator)
+                except (queue.Empty, StopIteration) as e:
+                    exhausted = isinstance(e, StopIteration)
+                    break
+                if task is None:
+                    exhausted = True
+                    break
+                key, args, timeout = task
+                now = time.monotonic()
+                try:
+                    worker.conn.send((key, args))
+                except (BrokenPipeError, EOFError, OSError):
+                    # Died while idle (e.g. killed at its RLIMIT_AS): fail this task, not the run
+                    self._replace(worker, kill=True)
+                    on_result({"key": key, "seconds": 0.0, "status": CRASHED, "error": "worker died"})
+                    continue
+                worker.task = (key, now, now + timeout if timeout else None)
+
+            busy = [w for w in self.workers if w.task]
+            if not busy and exhausted:
+                return
+
+            deadlines = [w.task[2] for w in busy if w.task[2]]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            if source and not exhausted:
+                wait_for = _IDLE_POLL_SECONDS if wait_for is None else min(wait_for, _IDLE_POLL_SECONDS)
+            if busy:
+                ready = wait([w.conn for w in busy], timeout=wait_for)
+            else:
+                time.sleep(wait_for or 0)
+                ready = []
+
+            now = time.monotonic()
+            for worker in list(busy):
+                key, started, deadline = worker.task
+                outcome = {"key": key, "seconds": now - started}
+                if worker.conn in ready:
+                    try:
+                        _, status, payload, rss = worker.conn.recv()
+                    except (EOFError, OSError):
+                        outcome.update(status=CRASHED, error="worker died")
+                        worker.task = None
+                        self._replace(worker, kill=True)
+                        on_result(outcome)
+                        continue
+                    outcome.update(status=status, rss_mb=round(rss, 1))
+                    outcome["result" if status == OK else "error"] = payload
+                    worker.task = None
+                    worker.tasks_done += 1
+                    if status == MEMORY or (self.max_tasks and worker.tasks_done >= self.max_tasks) or \
+                            (self.max_rss_mb and rss > self.max_rss_mb):
+                        self._replace(worker, kill=False)
+                    on_result(outcome)
+                elif deadline and now >= deadline:
+                    outcome.update(status=TIMEOUT, error=f"timed out after {deadline - started:g}s")
+                    worker.task = None
+                    self._replace(worker, kill=True)
+                    on_result(outcome)
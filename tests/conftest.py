@@ -0,0 +1,66 @@
+"""Shared fixtures: the scripts live in scripts/ and some are hyphenated, so load them by path."""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+_modules = {}
+
+PAGE = ('<html><head><title>Khuyến mãi tháng này</title></head><body><h2>Ưu đãi</h2>'
+        '<p>Nội dung ưu đãi gốc dành cho thành viên mới đăng ký.</p></body></html>')
+REWRITES = {"rewritten_title": "Ưu đãi mới",
+            "sections": [{"index": 0, "rewritten_content": "Nội dung ưu đãi đã được viết lại cho thành viên."}]}
+
+
+def load_script(name: str):
+    """Import a hyphenated script (e.g. 'batch-processor') once per test session."""
+    if name not in _modules:
+        spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+def parse_and_rewrite(site: Path, output: Path, rewrites: dict) -> dict:
+    """Parse every page under site into output and save rewrites into each parsed meta; returns the manifest."""
+    load_script('batch-processor').process_folder(str(site), str(output))
+    with open(output / "batch_manifest.json", 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    for entry in manifest["files"]:
+        if entry["status"] == "parsed":
+            load_script('html-rewriter').save_rewrites(entry["meta_file"], rewrites)
+    return manifest
+
+
+@pytest.fixture(scope="session")
+def batch_processor():
+    return load_script('batch-processor')
+
+
+@pytest.fixture(scope="session")
+def html_updater():
+    return load_script('html-updater')
+
+
+@pytest.fixture
+def rewritten_site(tmp_path):
+    """Factory: write PAGE at each relative path under tmp_path/site (default one page.html), then parse
+    and rewrite them into tmp_path/out. Returns the resolved page paths and the manifest."""
+    def build(*relative_paths):
+        site = tmp_path / "site"
+        pages = []
+        for relative_path in relative_paths or ("page.html",):
+            page = site / relative_path
+            page.parent.mkdir(parents=True, exist_ok=True)
+            page.write_text(PAGE, encoding='utf-8')
+            pages.append(page.resolve())
+        return pages, parse_and_rewrite(site, tmp_path / "out", REWRITES)
+    return build
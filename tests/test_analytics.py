@@ -0,0 +1,56 @@
+"""Analytics columns: bulk word counts match str.split, and the column cache only re-reads changed metas."""
+
+import json
+import os
+
+import pytest
+
+from nova_common import save_meta_file
+
+np = pytest.importorskip("numpy")
+
+from nova_analytics import load_columns  # noqa: E402
+
+TEXTS = ["Nhà cái  uy tín", "  Thưởng 100%\tnạp đầu\n", "", "một"]
+
+
+def _write_batch(tmp_path, pages: int = 3) -> str:
+    files = []
+    for n in range(pages):
+        meta = tmp_path / (f"p{n}_meta.json" if n % 2 else f"p{n}_meta.jsonl")
+        sections = [{"index": i, "heading_text": "H", "paragraphs": [{"text": t, "classes": ["c"]} for t in TEXTS],
+                     "rewritten_content": TEXTS[(i + n) % len(TEXTS)]} for i in range(4)]
+        save_meta_file(meta, {"source_file": f"p{n}.html", "status": "rewritten", "sections": sections,
+                              "rewritten_title": "Tiêu đề" * (n + 1)})
+        files.append({"source": f"p{n}.html", "relative_path": f"p{n}.html", "meta_file": str(meta)})
+    manifest_path = tmp_path / "batch_manifest.json"
+    manifest_path.write_text(json.dumps({"files": files}), encoding='utf-8')
+    return str(manifest_path)
+
+
+def test_columns_match_python_counts(tmp_path):
+    cols = load_columns(_write_batch(tmp_path))
+    original = ' '.join(TEXTS)
+    assert cols["files"] == ["p0.html", "p1.html", "p2.html"]
+    assert list(cols["orig_words"]) == [len(original.split())] * 12
+    assert list(cols["orig_chars"]) == [len(original)] * 12
+    expected = [TEXTS[(i + n) % len(TEXTS)] for n in range(3) for i in range(4)]
+    assert list(cols["new_words"]) == [len(t.split()) for t in expected]
+    assert list(cols["new_chars"]) == [len(t) for t in expected]
+    assert list(cols["section_file"]) == [0] * 4 + [1] * 4 + [2] * 4
+    assert list(cols["title_chars"]) == [7, 14, 21]
+
+
+def test_cache_rereads_only_changed_metas(tmp_path):
+    manifest_path = _write_batch(tmp_path)
+    assert load_columns(manifest_path)["cache"] == {"reused": 0, "refreshed": 3}
+    assert load_columns(manifest_path)["cache"] == {"reused": 3, "refreshed": 0}
+
+    meta = tmp_path / "p1_meta.json"
+    metadata = json.loads(meta.read_text(encoding='utf-8'))
+    metadata["sections"][0]["rewritten_content"] = "bốn từ mới đây"
+    save_meta_file(meta, metadata)
+    os.utime(meta, ns=(1, 1))
+    cols = load_columns(manifest_path)
+    assert cols["cache"] == {"reused": 2, "refreshed": 1}
+    assert cols["new_words"][4] == 4
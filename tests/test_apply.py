@@ -0,0 +1,36 @@
+"""Incremental apply: a page is rewritten once, never on top of its own output."""
+
+from conftest import REWRITES
+
+from nova_common import load_meta_header, update_meta_header
+
+
+def _page(rewritten_site):
+    pages, manifest = rewritten_site()
+    return pages[0], manifest["files"][0]["meta_file"]
+
+
+def test_reapply_is_up_to_date(rewritten_site, html_updater):
+    page, meta = _page(rewritten_site)
+    assert html_updater.apply_update(meta)[0] == 'updated'
+    assert html_updater.apply_update(meta)[0] == 'up_to_date'
+    assert REWRITES["sections"][0]["rewritten_content"] in page.read_text(encoding='utf-8')
+
+
+def test_legacy_updated_meta_is_not_applied_twice(rewritten_site, html_updater):
+    page, meta = _page(rewritten_site)
+    html_updater.apply_update(meta)
+    # Updated before applied_*_hash existed
+    update_meta_header(meta, applied_payload_hash=None, applied_page_hash=None)
+    written = page.read_bytes()
+
+    assert html_updater.apply_update(meta)[0] == 'up_to_date'
+    assert page.read_bytes() == written
+    header = load_meta_header(meta)
+    assert header["applied_page_hash"] and header["applied_payload_hash"]
+    assert html_updater.apply_update(meta)[0] == 'up_to_date'
+
+    # --force re-renders from the backup, not from the already rewritten page
+    update_meta_header(meta, applied_payload_hash=None, applied_page_hash=None)
+    assert html_updater.apply_update(meta, force=True)[0] == 'unchanged'
+    assert page.read_bytes() == written
@@ -0,0 +1,55 @@
+"""Learned boilerplate: selector rules need repeated text, content wrappers survive, the cache follows the pages."""
+
+from nova_boilerplate import learn_boilerplate, learn_or_load, strip_boilerplate
+from nova_common import make_soup
+
+MENU = '<ul class="menu"><li><a href="/">Trang chủ</a></li><li><a href="/slots">Slot game</a></li></ul>'
+
+
+def _page(n: int, menu: str = MENU) -> str:
+    # div.content is link-heavy on every page (long anchor lists) but wraps the page's own text
+    links = ''.join(f'<a href="/p{i}">Bài viết liên quan số {i} trên trang</a>' for i in range(8))
+    return (f'<html><body>{menu}<div class="content">{links}'
+            f'<p>Nội dung riêng của trang số {n}, không lặp lại ở trang khác.</p></div></body></html>')
+
+
+def _write_pages(folder, count: int = 6) -> list:
+    paths = []
+    for n in range(count):
+        path = folder / f"p{n}.html"
+        path.write_text(_page(n), encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def test_selector_rule_needs_repeated_text(tmp_path):
+    rules = learn_boilerplate(_write_pages(tmp_path))
+    assert "ul.menu" in rules["selector"]
+    assert "div.content" not in rules["selector"]
+
+
+def test_content_wrapper_is_never_stripped(tmp_path):
+    rules = learn_boilerplate(_write_pages(tmp_path))
+    # Force the worst case: a selector rule matching the wrapper of the page text
+    rules["selector"]["div.content"] = {"pages": 1.0, "link_density": 0.9}
+    soup = make_soup(_page(99), 'html.parser')
+    strip_boilerplate(soup.body, rules)
+    assert soup.find('div', class_='content') is not None
+    assert 'trang số 99' in soup.get_text()
+    assert soup.find('ul', class_='menu') is None
+
+
+def test_cache_relearns_when_sampled_pages_change(tmp_path):
+    paths = _write_pages(tmp_path)
+    output = tmp_path / "out"
+    output.mkdir()
+    _, _, cached = learn_or_load(output, paths)
+    assert not cached
+    _, _, cached = learn_or_load(output, paths)
+    assert cached
+
+    for path in paths:
+        path.write_text(_page(int(path.stem[1:]), menu=''), encoding='utf-8')
+    rules, _, cached = learn_or_load(output, paths)
+    assert not cached
+    assert "ul.menu" not in rules["selector"]
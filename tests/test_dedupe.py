@@ -0,0 +1,54 @@
+"""Identical pages: parsed once, the update fans out to every copy and rollback restores each one."""
+
+import os
+
+import pytest
+from conftest import PAGE
+
+from nova_common import load_meta_header
+from nova_evidence import evidence_report
+
+
+def _mirrored_site(rewritten_site):
+    pages, manifest = rewritten_site("khuyen-mai.html", "amp/khuyen-mai.html")
+    canonical = [f for f in manifest["files"] if not f.get("duplicate_of")]
+    assert len(canonical) == 1 and len(manifest["files"]) == 2
+    # Canonical page first, then its copy
+    pages.sort(key=lambda page: str(page) != canonical[0]["source"])
+    assert str(pages[0]) == canonical[0]["source"]
+    return pages, canonical[0]["meta_file"]
+
+
+def test_update_fans_out_and_rollback_restores_every_copy(rewritten_site, html_updater):
+    pages, meta = _mirrored_site(rewritten_site)
+    originals = [page.read_bytes() for page in pages]
+
+    action, stats = html_updater.apply_update(meta)
+    assert action == 'updated' and stats["copies_written"] == 1
+    assert pages[0].read_bytes() == pages[1].read_bytes() != originals[0]
+
+    assert html_updater.rollback(meta)
+    assert [page.read_bytes() for page in pages] == originals
+
+
+def test_rollback_fails_when_a_copy_backup_is_missing(rewritten_site, html_updater):
+    pages, meta = _mirrored_site(rewritten_site)
+    html_updater.apply_update(meta)
+    os.remove(load_meta_header(meta)["copies"][0]["backup_path"])
+
+    assert not html_updater.rollback(meta)
+    # The page itself is still restored; the copy keeps the update
+    assert pages[0].read_bytes() == PAGE.encode('utf-8')
+    assert pages[1].read_bytes() != PAGE.encode('utf-8')
+
+
+def test_copies_are_reported_once(tmp_path, rewritten_site):
+    _mirrored_site(rewritten_site)
+    manifest_path = str(tmp_path / "out" / "batch_manifest.json")
+    report = evidence_report(manifest_path, str(tmp_path / "evidence.db"))
+    assert report["pages"] == 1
+
+    pytest.importorskip("numpy")
+    from nova_analytics import load_columns
+    cols = load_columns(manifest_path)
+    assert len(cols["files"]) == 1 and cols["new_words"].size == 1
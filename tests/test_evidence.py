@@ -0,0 +1,32 @@
+"""Claim extraction: each number is one claim of the right kind, decimals stay decimals."""
+
+import pytest
+
+from nova_evidence import _number, extract_claims
+
+
+def _kinds(text: str) -> list:
+    return [(c["kind"], c["value"]) for c in extract_claims(text)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Nội dung 100% tiếng Việt", []),
+    ("RTP 96,5%", [("rtp", 96.5)]),
+    ("Game có RTP 96.5% và thưởng 100% nạp đầu", [("rtp", 96.5), ("bonus_pct", 100.0)]),
+    ("kèo 96,5%", []),
+    ("kèo 1.875 cho đội nhà", [("odds", 1.875)]),
+    ("tỷ lệ cược 1,95.", [("odds", 1.95)]),
+    ("Nạp tối thiểu 1.000.000 VNĐ", [("amount", 1000000.0)]),
+    ("Thưởng 1.875 VND", [("amount", 1875.0)]),
+    ("Rút tối đa 1,5 triệu đồng", [("amount", 1500000.0)]),
+])
+def test_extract_claims(text, expected):
+    assert _kinds(text) == expected
+
+
+def test_number_groups_thousands_only_when_asked():
+    assert _number("1.875") == 1.875
+    assert _number("96,5") == 96.5
+    assert _number("1.875", grouped=True) == 1875.0
+    assert _number("1,000,000", grouped=True) == 1000000.0
+    assert _number("1,5", grouped=True) == 1.5
@@ -0,0 +1,51 @@
+"""nova.py serve in pool mode: a killed update is rolled back, and pages are never left half-written."""
+
+import io
+import json
+import os
+
+from conftest import PAGE
+
+from nova import serve
+from nova_common import load_meta_header, write_if_changed
+from nova_workers import TIMEOUT
+
+
+def _serve(requests: list, **limits) -> dict:
+    stdout = io.StringIO()
+    serve(stdin=io.StringIO(''.join(json.dumps(req) + "\n" for req in requests)), stdout=stdout, **limits)
+    return {r["id"]: r for r in map(json.loads, stdout.getvalue().splitlines())}
+
+
+def test_timed_out_update_is_rolled_back(rewritten_site):
+    pages, manifest = rewritten_site()
+    meta = manifest["files"][0]["meta_file"]
+    # Far too short for the worker to even load the updater
+    responses = _serve([{"id": 1, "op": "update", "meta_file": meta, "timeout": 0.001}], workers=2)
+
+    assert responses[1]["status"] == TIMEOUT and responses[1]["rolled_back"]
+    assert pages[0].read_text(encoding='utf-8') == PAGE
+    assert load_meta_header(meta)["status"] == 'update_failed_rolled_back'
+
+
+def test_write_if_changed_replaces_the_file(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_bytes(b"old")
+    os.chmod(page, 0o640)
+
+    assert write_if_changed(page, b"new content")
+    assert page.read_bytes() == b"new content"
+    assert os.stat(page).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["page.html"]
+    assert not write_if_changed(page, b"new content")
+
+
+def test_status_waits_for_parse_of_the_same_page(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text(PAGE, encoding='utf-8')
+    meta = str(tmp_path / "out" / "page_meta.json")
+    responses = _serve([{"id": 1, "op": "parse", "html_file": str(page), "output": str(tmp_path / "out")},
+                        {"id": 2, "op": "status", "meta_file": meta}], workers=2)
+
+    assert responses[1]["ok"] and responses[1]["result"]["meta_file"] == meta
+    assert responses[2]["ok"] and responses[2]["result"]["status"] == 'pending_rewrite'
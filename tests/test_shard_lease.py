@@ -0,0 +1,143 @@
+"""Shard leases: exactly one owner under concurrent claims, takeovers and renewals; re-sharding and merging."""
+
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from conftest import load_script
+
+ROUNDS = 25
+CONTENDERS = 4
+
+
+def _claim(shard_path, worker_id, lease_seconds, barrier, results):
+    bp = load_script('batch-processor')
+    barrier.wait()
+    results.put((worker_id, bp.claim_shard(shard_path, worker_id, lease_seconds)))
+
+
+def _race(shard_path, lease_seconds=60):
+    """Claim one shard from CONTENDERS processes at once; returns {worker: token or None}."""
+    ctx = multiprocessing.get_context('fork')
+    barrier = ctx.Barrier(CONTENDERS)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_claim, args=(shard_path, f"w{n}", lease_seconds, barrier, results))
+             for n in range(CONTENDERS)]
+    for proc in procs:
+        proc.start()
+    outcome = dict(results.get(timeout=30) for _ in procs)
+    for proc in procs:
+        proc.join(timeout=30)
+    return outcome
+
+
+def _owners(outcome):
+    return [worker for worker, token in outcome.items() if token]
+
+
+def test_concurrent_fresh_claim_has_one_owner(tmp_path, batch_processor):
+    for n in range(ROUNDS):
+        shard_path = str(tmp_path / f"shard-{n:04d}.json")
+        outcome = _race(shard_path)
+        owners = _owners(outcome)
+        assert len(owners) == 1
+        lease = batch_processor.read_lease(shard_path)
+        assert lease["worker"] == owners[0] and lease["token"] == outcome[owners[0]]
+
+
+def test_concurrent_stale_takeover_has_one_owner(tmp_path, batch_processor):
+    for n in range(ROUNDS):
+        shard_path = str(tmp_path / f"shard-{n:04d}.json")
+        with open(f"{shard_path}.lock", 'w', encoding='utf-8') as f:
+            json.dump({"worker": "dead", "token": "old", "expires_at": time.time() - 1}, f)
+        outcome = _race(shard_path)
+        owners = _owners(outcome)
+        assert len(owners) == 1
+        assert batch_processor.read_lease(shard_path)["token"] == outcome[owners[0]]
+
+
+def test_unreadable_young_lock_is_held(tmp_path, batch_processor):
+    shard_path = str(tmp_path / "shard-0000.json")
+    open(f"{shard_path}.lock", 'w').close()
+    assert batch_processor.claim_shard(shard_path, "w1", 60) is None
+
+    # Older than the TTL: the writer is gone, the lock may be taken over
+    old = time.time() - 120
+    os.utime(f"{shard_path}.lock", (old, old))
+    assert batch_processor.claim_shard(shard_path, "w1", 60)
+
+
+def test_renew_and_release_require_the_token(tmp_path, batch_processor):
+    shard_path = str(tmp_path / "shard-0000.json")
+    token = batch_processor.claim_shard(shard_path, "w1", 60)
+    assert token
+    assert not batch_processor.renew_lease(shard_path, "w1", 60, "other-token")
+    assert not batch_processor.renew_lease(shard_path, "w2", 60, token)
+    batch_processor.release_shard(shard_path, "w2", token)
+    assert batch_processor.read_lease(shard_path)["worker"] == "w1"
+    assert batch_processor.renew_lease(shard_path, "w1", 60, token)
+    batch_processor.release_shard(shard_path, "w1", token)
+    assert batch_processor.read_lease(shard_path) is None
+
+
+def test_heartbeat_outlives_a_slow_file(tmp_path, batch_processor):
+    lease_seconds = 0.6
+    shard_path = str(tmp_path / "shard-0000.json")
+    token = batch_processor.claim_shard(shard_path, "w1", lease_seconds)
+    with batch_processor.LeaseHeartbeat(shard_path, "w1", token, lease_seconds) as heartbeat:
+        time.sleep(lease_seconds * 3)
+        assert batch_processor.claim_shard(shard_path, "w2", lease_seconds) is None
+        assert not heartbeat.lost.is_set()
+
+
+def _sharded_site(tmp_path, batch_processor, pages=4):
+    site = tmp_path / "site"
+    site.mkdir()
+    for n in range(pages):
+        (site / f"p{n}.html").write_text(f"<html><body><h2>Trang {n}</h2><p>Nội dung riêng của trang số {n}.</p>"
+                                         f"</body></html>", encoding='utf-8')
+    manifest = batch_processor.create_batch_manifest(str(site.resolve()), str(tmp_path / "out"),
+                                                     sorted(site.resolve().glob("*.html")))
+    (tmp_path / "out").mkdir()
+    manifest_path = str(tmp_path / "out" / "batch_manifest.json")
+    batch_processor.save_manifest(manifest, manifest_path)
+    return manifest_path
+
+
+def test_reshard_replaces_earlier_shards(tmp_path, batch_processor):
+    manifest_path = _sharded_site(tmp_path, batch_processor)
+    shards_dir = tmp_path / "out" / "shards"
+    assert len(batch_processor.shard_manifest(manifest_path, 4)) == 4
+    assert len(batch_processor.shard_manifest(manifest_path, 2)) == 2
+    assert sorted(p.name for p in shards_dir.glob("shard-*.json")) == ["shard-0000.json", "shard-0001.json"]
+
+    results = batch_processor.run_shard_worker(str(shards_dir), "w1", parser='html.parser')
+    assert results["parsed"] == 4
+
+
+def test_reshard_refused_while_a_shard_is_leased(tmp_path, batch_processor):
+    manifest_path = _sharded_site(tmp_path, batch_processor)
+    paths = batch_processor.shard_manifest(manifest_path, 2)
+    assert batch_processor.claim_shard(paths[0], "w1", 60)
+    with pytest.raises(ValueError):
+        batch_processor.shard_manifest(manifest_path, 4)
+    assert len(list((tmp_path / "out" / "shards").glob("shard-*.json"))) == 2
+
+
+def test_merge_keeps_the_most_advanced_status(tmp_path, batch_processor):
+    manifest_path = _sharded_site(tmp_path, batch_processor, pages=1)
+    shards_dir = tmp_path / "out" / "shards"
+    shards_dir.mkdir()
+    manifest = batch_processor.load_manifest(manifest_path)
+    parsed = dict(manifest["files"][0], status="parsed", meta_file="p0_meta.json")
+    stale = dict(manifest["files"][0], status="pending")
+    for n, file_info in enumerate([parsed, stale]):
+        batch_processor.save_manifest({"manifest": manifest_path, "shard": n, "status": "done", "total_files": 1,
+                                       "files": [file_info]}, str(shards_dir / f"shard-{n:04d}.json"))
+
+    merged = batch_processor.merge_shards(str(shards_dir))
+    assert merged["status"] == "parsed"
+    assert batch_processor.load_manifest(manifest_path)["files"][0]["meta_file"] == "p0_meta.json"
@@ -0,0 +1,52 @@
+"""Watch mode: pages the updater wrote are not re-parsed, and a re-parse never loses the original backup."""
+
+import json
+from pathlib import Path
+
+from conftest import PAGE, REWRITES
+
+from nova_common import load_meta_header
+
+
+def _watched(rewritten_site):
+    pages, manifest = rewritten_site()
+    return pages[0].parent, pages[0], manifest
+
+
+def test_updated_page_is_not_reparsed(tmp_path, rewritten_site, batch_processor, html_updater):
+    site, page, manifest = _watched(rewritten_site)
+    meta = manifest["files"][0]["meta_file"]
+    backup = load_meta_header(meta)["backup_path"]
+    html_updater.apply_update(meta)
+
+    counts = batch_processor.apply_changes(manifest, site, tmp_path / "out", 'html.parser', [], [str(page)], [])
+    assert counts["skipped"] == 1 and counts["modified"] == 0
+    header = load_meta_header(meta)
+    assert header["status"] == 'updated' and header["rewritten_title"] == REWRITES["rewritten_title"]
+    assert header["backup_path"] == backup and Path(backup).read_text(encoding='utf-8') == PAGE
+
+
+def test_reparse_keeps_the_original_backup(tmp_path, rewritten_site, batch_processor, html_updater):
+    site, page, manifest = _watched(rewritten_site)
+    meta = manifest["files"][0]["meta_file"]
+    backup = load_meta_header(meta)["backup_path"]
+    html_updater.apply_update(meta)
+
+    # A full re-run over the same output dir re-parses every page
+    result = batch_processor.parse_html_file(page, tmp_path / "out", parser='html.parser')
+    assert result["backup"] == backup and Path(backup).read_text(encoding='utf-8') == PAGE
+    assert json.loads(Path(result["meta_file"]).read_text(encoding='utf-8'))["backup_path"] == backup
+
+
+def test_pending_page_edit_is_reparsed(tmp_path, batch_processor):
+    site = tmp_path / "site"
+    site.mkdir()
+    page = site / "page.html"
+    page.write_text(PAGE, encoding='utf-8')
+    batch_processor.process_folder(str(site), str(tmp_path / "out"))
+    manifest = json.loads((tmp_path / "out" / "batch_manifest.json").read_text(encoding='utf-8'))
+
+    page.write_text(PAGE.replace('gốc', 'mới'), encoding='utf-8')
+    counts = batch_processor.apply_changes(manifest, site.resolve(), tmp_path / "out", 'html.parser',
+                                           [], [str(page.resolve())], [])
+    assert counts["modified"] == 1
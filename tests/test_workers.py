@@ -0,0 +1,40 @@
+"""FileWorkerPool: a dead worker fails its task instead of aborting the run."""
+
+import time
+
+from nova_workers import CRASHED, OK, TIMEOUT, FileWorkerPool
+
+
+def _echo(value):
+    return value
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_send_to_dead_worker_fails_the_task_and_respawns():
+    outcomes = {}
+    with FileWorkerPool(_echo, workers=1) as pool:
+        def on_result(outcome):
+            outcomes[outcome["key"]] = outcome
+            if outcome["key"] == "a":
+                # Killed while idle, as by RLIMIT_AS between files: the next send hits a broken pipe
+                pool.workers[0].process.kill()
+                pool.workers[0].process.join()
+
+        pool.run([("a", (1,), 0), ("b", (2,), 0), ("c", (3,), 0)], on_result)
+        assert pool.recycled == 1
+
+    assert outcomes["a"]["status"] == OK
+    assert outcomes["b"]["status"] == CRASHED and outcomes["b"]["error"] == "worker died"
+    assert outcomes["c"]["status"] == OK and outcomes["c"]["result"] == 3
+
+
+def test_timeout_replaces_the_worker():
+    outcomes = {}
+    with FileWorkerPool(_sleep, workers=1) as pool:
+        pool.run([("slow", (5,), 0.2), ("fast", (0,), 0)], lambda o: outcomes.update({o["key"]: o}))
+    assert outcomes["slow"]["status"] == TIMEOUT
+    assert outcomes["fast"]["status"] == OK